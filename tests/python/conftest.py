@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The Python tooling is a set of scripts that import their siblings from tools/.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tools"))
@@ -0,0 +1,13 @@
+from canonical_fuzz import FUZZ_VECTORS, record_vectors
+
+
+def test_record_vectors_appends_new_vectors_with_trailing_newline(tmp_path):
+    path = tmp_path / "vectors.json"
+    vectors = [{"expected_hash": "a"}, {"expected_hash": "b"}, {"expected_hash": "a"}]
+    assert record_vectors(path, vectors) == 2
+    assert record_vectors(path, vectors) == 0
+    assert path.read_text(encoding="utf-8").endswith("]\n")
+
+
+def test_checked_in_vectors_end_with_newline():
+    assert FUZZ_VECTORS.read_bytes().endswith(b"]\n")
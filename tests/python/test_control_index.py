@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+pytest.importorskip("yaml")
+
+from control_index import ControlIndex  # noqa: E402
+
+CATALOG = {"catalog": {"metadata": {"title": "Test catalog"}, "groups": [{"id": "ac", "controls": [
+    {"id": "ac-2", "title": "Account Management", "controls": [
+        {"id": "ac-2.1", "title": "Automated Account Management",
+         "props": [{"name": "tag", "value": "IAM-Automation"}]},
+    ]},
+    {"id": "ac-6", "title": "Least Privilege"},
+]}, {"id": "si", "controls": [{"id": "si-2", "title": "Flaw Remediation"}]}]}}
+PROFILE = {"profile": {"metadata": {"title": "baseline"},
+                       "imports": [{"include-all": {}, "exclude-controls": [{"with-ids": ["ac-6"]}]}]}}
+MAPPING = """\
+mappings:
+  - source: CC6.1
+    controls: [ac-6]
+    tags: [least-privilege]
+"""
+
+
+def _pack(root, rel, name, tags):
+    pack = root / "packs" / rel
+    pack.mkdir(parents=True, exist_ok=True)
+    (pack / "pack.yaml").write_text(f"metadata:\n  name: {name}\n  tags: {json.dumps(tags)}\n", encoding="utf-8")
+    return pack / "pack.yaml"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    oscal = tmp_path / "controls" / "oscal"
+    (oscal / "profiles").mkdir(parents=True)
+    (oscal / "catalog.json").write_text(json.dumps(CATALOG), encoding="utf-8")
+    (oscal / "profiles" / "baseline.json").write_text(json.dumps(PROFILE), encoding="utf-8")
+    (tmp_path / "controls" / "mappings").mkdir()
+    (tmp_path / "controls" / "mappings" / "soc2-to-controls.yml").write_text(MAPPING, encoding="utf-8")
+    _pack(tmp_path, "core/iam", "iam", ["AC-2", "iam-automation"])
+    _pack(tmp_path, "core/privs", "privs", ["least-privilege"])
+    _pack(tmp_path, "_template", "template", ["si-2"])
+    _pack(tmp_path, "_drafts/patching", "patching", ["si-2"])
+    return tmp_path
+
+
+def test_lookups(tree):
+    index, stats = ControlIndex.build(tree, tree / "index.json")
+    assert stats["sources"] == 5
+    assert index.controls_for("iam") == ["ac-2", "ac-2.1"]
+    assert index.controls_for("privs") == ["ac-6"]
+    assert index.packs_for("ac-6") == ["privs"]
+    assert index.controls_for_source("CC6.1") == ["ac-6"]
+    assert "template" not in index.tables["pack_controls"]
+    assert index.coverage("baseline") == {"controls": 3, "covered": 2, "ratio": 0.6667, "uncovered": ["si-2"]}
+
+    drafts, _ = ControlIndex.build(tree, None, include_drafts=True)
+    assert drafts.packs_for("si-2") == ["patching"]
+    assert drafts.coverage("baseline")["uncovered"] == []
+
+
+def test_incremental_rebuild_reparses_only_changed_sources(tree):
+    path = tree / "index.json"
+    _, stats = ControlIndex.build(tree, path)
+    assert len(stats["reparsed"]) == 5 and stats["removed"] == []
+
+    written = path.stat().st_mtime_ns
+    index, stats = ControlIndex.build(tree, path)
+    assert (stats["reparsed"], stats["removed"]) == ([], [])
+    assert path.stat().st_mtime_ns == written
+    assert index.controls_for("privs") == ["ac-6"]
+
+    _pack(tree, "core/privs", "privs", ["si-2"])
+    index, stats = ControlIndex.build(tree, path)
+    assert (stats["reparsed"], stats["removed"]) == (["packs/core/privs/pack.yaml"], [])
+    assert index.controls_for("privs") == ["si-2"]
+    assert index.packs_for("ac-6") == []
+
+    (tree / "controls" / "mappings" / "soc2-to-controls.yml").unlink()
+    index, stats = ControlIndex.build(tree, path)
+    assert (stats["reparsed"], stats["removed"]) == ([], ["controls/mappings/soc2-to-controls.yml"])
+    assert index.controls_for_source("CC6.1") == []
+    assert ControlIndex.load(path).tables == index.tables
+
+    # Switching --include-drafts discards the previous index.
+    _, stats = ControlIndex.build(tree, path, include_drafts=True)
+    assert len(stats["reparsed"]) == 5
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tools" / "dev" / "mock"))
+
+import pytest  # noqa: E402
+
+pytest.importorskip("yaml")
+
+from decision_cache import DecisionCache  # noqa: E402
+
+
+def evaluate_by_name(pack_path, input_data):
+    return {"decision": "deny" if Path(pack_path).name == "strict" else "allow"}
+
+
+def test_packs_without_digest_files_do_not_share_entries(tmp_path):
+    (tmp_path / "strict").mkdir()
+    (tmp_path / "lenient").mkdir()
+    cache = DecisionCache()
+    assert cache.evaluate(tmp_path / "strict", {}, evaluate_by_name).decision["decision"] == "deny"
+    assert cache.evaluate(tmp_path / "lenient", {}, evaluate_by_name).decision["decision"] == "allow"
+    assert cache.misses == 2
+
+
+def test_corrupt_disk_entry_is_a_miss(tmp_path):
+    pack = tmp_path / "strict"
+    pack.mkdir()
+    (pack / "pack.yaml").write_text("kind: Pack\n")
+    disk = tmp_path / "cache"
+    first = DecisionCache(cache_dir=disk).evaluate(pack, {"n": 1}, evaluate_by_name)
+    entry = disk / first.pack_digest / f"{first.input_hash}.json"
+    entry.write_text('{"decision": ')
+
+    cache = DecisionCache(cache_dir=disk)
+    assert cache.evaluate(pack, {"n": 1}, evaluate_by_name).decision == {"decision": "deny"}
+    assert (cache.disk_hits, cache.misses) == (0, 1)
+    assert DecisionCache(cache_dir=disk).evaluate(pack, {"n": 1}, evaluate_by_name).canonical == first.canonical
+
+
+def test_pack_yaml_edit_invalidates_on_the_next_lookup(tmp_path):
+    pack = tmp_path / "strict"
+    (pack / "tests").mkdir(parents=True)
+    (pack / "pack.yaml").write_text("kind: Pack\n")
+    (pack / "tests" / "cases.yaml").write_text("cases: []\n")
+    cache = DecisionCache()
+    before = cache.evaluate(pack, {}, evaluate_by_name).pack_digest
+
+    (pack / "tests" / "cases.yaml").write_text("cases: [1]\n")
+    assert cache.evaluate(pack, {}, evaluate_by_name).pack_digest == before
+
+    (pack / "pack.yaml").write_text("kind: Pack\nversion: 2\n")
+    assert cache.evaluate(pack, {}, evaluate_by_name).pack_digest != before
+    assert (cache.hits, cache.misses, cache.invalidations) == (1, 2, 1)
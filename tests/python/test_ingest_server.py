@@ -0,0 +1,125 @@
+import asyncio
+import json
+import socket
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("jsonschema")
+
+from ingest_server import IngestServer  # noqa: E402
+from simulate_ledger import Ledger  # noqa: E402
+
+SAMPLE = json.loads((Path(__file__).resolve().parents[2] / "tests" / "fixtures" / "observation.sample.json")
+                    .read_text(encoding="utf-8"))
+
+
+def line(n: int) -> bytes:
+    return json.dumps(dict(SAMPLE, context={"env": "dev", "n": str(n)})).encode("utf-8") + b"\n"
+
+
+class FailingLedger(Ledger):
+    def __init__(self, fail_at: int):
+        super().__init__()
+        self.fail_at = fail_at
+
+    def append(self, record_type, payload):
+        if payload["context"]["n"] == str(self.fail_at):
+            raise OSError("disk full")
+        return super().append(record_type, payload)
+
+
+async def _session(server: IngestServer, data: bytes, line_limit: int = 2 ** 16):
+    writer_task = asyncio.create_task(server.writer())
+    srv = await asyncio.start_server(server.handle, "127.0.0.1", 0, limit=line_limit)
+    port = srv.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    writer.write_eof()
+    acks = [json.loads(raw) async for raw in _lines(reader)]
+    writer.close()
+    srv.close()
+    writer_task.cancel()
+    return acks
+
+
+async def _lines(reader):
+    while raw := await reader.readline():
+        yield raw
+
+
+def run(server, data, **kwargs):
+    return asyncio.run(_session(server, data, **kwargs))
+
+
+def test_acks_in_order_with_validation_errors():
+    server = IngestServer(Ledger(), batch_size=4)
+    acks = run(server, line(0) + b"not json\n" + line(1) + b'{"source": "x"}\n' + line(2))
+    assert [a["ok"] for a in acks] == [True, False, True, False, True]
+    assert [a["entry_index"] for a in acks if a["ok"]] == [1, 2, 3]
+    assert acks[1]["error"].startswith("invalid JSON")
+
+
+def test_append_failure_fails_only_the_failed_entry_and_the_rest_of_the_batch():
+    server = IngestServer(FailingLedger(fail_at=2), batch_size=512)
+    acks = asyncio.run(_batched(server, [line(n) for n in range(5)]))
+    assert [a["ok"] for a in acks] == [True, True, False, False, False]
+    assert [a.get("entry_index") for a in acks[:2]] == [1, 2]
+    assert acks[2]["error"] == "ledger append failed: disk full"
+    assert len(server.ledger.chain) == 3
+
+
+async def _batched(server, lines):
+    # Queue every line before the writer starts so they form one batch.
+    loop = asyncio.get_running_loop()
+    futs = []
+    for raw in lines:
+        fut = loop.create_future()
+        await server.queue.put((json.loads(raw), fut))
+        futs.append(fut)
+    task = asyncio.create_task(server.writer())
+    results = await asyncio.gather(*futs)
+    task.cancel()
+    return results
+
+
+def test_over_long_line_is_acked_and_connection_continues():
+    server = IngestServer(Ledger(), line_limit=1024)
+    long_line = b'{"x": "' + b"a" * 5000 + b'"}\n'
+    acks = run(server, line(0) + long_line + line(1), line_limit=1024)
+    assert acks[1] == {"ok": False, "error": "line too long"}
+    assert [a["ok"] for a in acks] == [True, False, True]
+
+
+def test_collector_that_never_reads_acks_is_throttled():
+    total = 50000
+
+    async def scenario():
+        server = IngestServer(Ledger(), max_inflight=64)
+        writer_task = asyncio.create_task(server.writer())
+        srv = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        # Small kernel buffers so unread acks back up quickly.
+        srv.sockets[0].setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.connect(srv.sockets[0].getsockname())
+        sock.setblocking(False)
+        _, writer = await asyncio.open_connection(sock=sock)
+        sender = asyncio.create_task(_send(writer, b"".join(line(n) for n in range(total))))
+        await asyncio.sleep(0.5)
+        stalled_at = server.accepted
+        await asyncio.sleep(0.5)
+        accepted = server.accepted
+        sender.cancel()
+        writer.transport.abort()
+        srv.close()
+        writer_task.cancel()
+        return stalled_at, accepted
+
+    stalled_at, accepted = asyncio.run(scenario())
+    assert accepted == stalled_at < total // 10
+
+
+async def _send(writer, payload):
+    writer.write(payload)
+    await writer.drain()
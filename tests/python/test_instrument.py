@@ -0,0 +1,36 @@
+import pytest
+
+import instrument
+
+
+@pytest.fixture
+def metrics():
+    instrument.reset()
+    instrument.enable(tracemalloc=("*",))
+    yield instrument
+    instrument.disable()
+    instrument.reset()
+
+
+def test_counters_and_stage_calls_are_exact(metrics):
+    metrics.count("bytes", 123456789, stage="hash")
+    metrics.count("ratio", 0.5)
+    for _ in range(3):
+        with metrics.stage("hash"):
+            pass
+    text = metrics.to_prometheus()
+    assert 'paygod_bytes_total{stage="hash"} 123456789\n' in text
+    assert "paygod_ratio_total 0.5\n" in text
+    assert 'paygod_stage_calls_total{stage="hash"} 3\n' in text
+
+
+def test_nested_stage_does_not_reset_outer_peak(metrics):
+    with metrics.stage("outer"):
+        big = bytearray(4 * 1024 * 1024)
+        del big
+        with metrics.stage("inner"):
+            small = bytearray(1024)
+            del small
+    stages = metrics.snapshot()["stages"]
+    assert stages["outer"]["peak_alloc_bytes"] >= 4 * 1024 * 1024
+    assert stages["inner"]["peak_alloc_bytes"] < 1024 * 1024
@@ -0,0 +1,108 @@
+import json
+import sys
+import uuid
+
+import pytest
+
+import ledger_index
+from ledger_index import IndexedLedger, LedgerIndex
+from simulate_ledger import Ledger
+
+
+def test_record_types_are_stored_under_hashed_names(tmp_path):
+    path = tmp_path / "ledger.jsonl"
+    with IndexedLedger(path) as ledger:
+        ledger.append("a/b", {"x": 1})
+        ledger.append("../../escape", {"y": 2})
+        assert [e["record_type"] for e in ledger.query(record_type="a/b")] == ["a/b"]
+    assert not (tmp_path / "escape.bin").exists()
+    assert all(p.parent == path.with_name("ledger.jsonl.idx") / "types"
+               for p in tmp_path.rglob("*.bin") if "types" in p.parts)
+
+    index = LedgerIndex(path)
+    assert [e["record_payload"] for e in index.query(record_type="../../escape")] == [{"y": 2}]
+
+
+def test_failed_index_leaves_ledger_and_index_consistent(tmp_path, monkeypatch):
+    path = tmp_path / "ledger.jsonl"
+    ledger = IndexedLedger(path)
+    ledger.append("observation", {"n": 1})
+
+    real_append = Ledger.append
+
+    def bad_timestamp(self, record_type, payload):
+        entry = real_append(self, record_type, payload)
+        entry["timestamp"] = "not a timestamp"
+        return entry
+
+    monkeypatch.setattr(Ledger, "append", bad_timestamp)
+    with pytest.raises(ValueError):
+        ledger.append("observation", {"n": 2})
+    monkeypatch.undo()
+
+    ledger.append("observation", {"n": 3})
+    ledger.close()
+
+    chain = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [e["record_payload"] for e in chain[1:]] == [{"n": 1}, {"n": 3}]
+    assert Ledger.from_chain(chain).verify() == (True, -1)
+    index = LedgerIndex(path)
+    assert index.update() == 0
+    assert len(index) == len(chain)
+
+
+def test_ids_are_found_across_merged_generations(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger_index, "ID_TAIL_MIN", 8)
+    path = tmp_path / "ledger.jsonl"
+    with IndexedLedger(path) as ledger:
+        ids = [ledger.append("observation", {"n": n})["entry_id"] for n in range(100)]
+        assert ledger.get(ids[57])["record_payload"] == {"n": 57}
+    assert len(list((tmp_path / "ledger.jsonl.idx").glob("ids.*.bin"))) == 1
+
+    index = LedgerIndex(path)
+    assert [index.get(i)["record_payload"]["n"] for i in ids] == list(range(100))
+    assert index.get(str(uuid.uuid4())) is None
+    assert index.position_of("not-a-uuid") is None
+    assert index.get("") is None
+
+
+def test_out_of_order_timestamps_are_still_found(tmp_path, monkeypatch):
+    path = tmp_path / "ledger.jsonl"
+    stamps = iter(["2026-01-01T00:00:10Z", "2026-01-01T00:00:05Z", "2026-01-01T00:00:20Z"])
+    real_append = Ledger.append
+
+    def stamped(self, record_type, payload):
+        entry = real_append(self, record_type, payload)
+        entry["timestamp"] = next(stamps)
+        return entry
+
+    monkeypatch.setattr(Ledger, "append", stamped)
+    with IndexedLedger(path) as ledger:
+        for n in range(3):
+            ledger.append("observation", {"n": n})
+    monkeypatch.undo()
+
+    index = LedgerIndex(path)
+    found = index.query(since="2026-01-01T00:00:01Z", until="2026-01-01T00:00:12Z")
+    assert [e["record_payload"] for e in found] == [{"n": 0}, {"n": 1}]
+
+
+def test_older_index_format_is_rebuilt(tmp_path):
+    path = tmp_path / "ledger.jsonl"
+    with IndexedLedger(path) as ledger:
+        eid = ledger.append("decision", {"n": 1})["entry_id"]
+    state = path.with_name("ledger.jsonl.idx") / "state.json"
+    state.write_text(json.dumps({"indexed_bytes": 0, "lengths": {"time.bin": 4}}))
+
+    index = LedgerIndex(path)
+    assert index.update() == 2
+    assert index.get(eid)["record_payload"] == {"n": 1}
+    assert [e["record_type"] for e in index.query(record_type="decision")] == ["decision"]
+
+
+def test_cli_rejects_a_malformed_id(tmp_path, capsys, monkeypatch):
+    path = tmp_path / "ledger.jsonl"
+    IndexedLedger(path).close()
+    monkeypatch.setattr(sys, "argv", ["ledger_index.py", "query", str(path), "--id", "nope"])
+    assert ledger_index.main() == 2
+    assert "invalid entry id" in capsys.readouterr().err
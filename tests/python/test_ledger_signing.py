@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+import ledger_signing  # noqa: E402
+from simulate_ledger import Ledger  # noqa: E402
+
+CHUNK = 4
+
+
+@pytest.fixture
+def keys(tmp_path):
+    return ledger_signing.generate_key(tmp_path / "key.pem")
+
+
+@pytest.fixture
+def signed(keys):
+    ledger = Ledger()
+    records = [("observation", {"source": "test", "amount": n}) for n in range(10)]
+    ledger_signing.append_many(ledger, records, keys[0], workers=1, chunk_size=CHUNK)
+    return ledger
+
+
+@pytest.fixture
+def verify_calls(monkeypatch):
+    calls = []
+    real = ledger_signing._verify_chunk
+
+    def counting(start, digests, signatures):
+        calls.append(start)
+        return real(start, digests, signatures)
+
+    monkeypatch.setattr(ledger_signing, "_verify_chunk", counting)
+    return calls
+
+
+def verify(ledger, pub, **kwargs):
+    return ledger_signing.verify_signed(ledger.chain, pub, workers=1, chunk_size=CHUNK, **kwargs)
+
+
+def test_append_many_signs_every_entry_without_changing_the_chain(signed, keys):
+    assert all(e["signature"].startswith("ed25519:") for e in signed.chain)
+    assert signed.verify() == (True, -1)
+    assert verify(signed, keys[1]) == (True, [])
+
+
+def test_process_pool_signatures_verify(keys):
+    ledger = Ledger()
+    records = [("observation", {"n": n}) for n in range(20)]
+    ledger_signing.append_many(ledger, records, keys[0], workers=2, chunk_size=CHUNK)
+    ok, problems = ledger_signing.verify_signed(ledger.chain, keys[1], workers=2, chunk_size=CHUNK)
+    assert ok, problems
+
+
+def test_tampered_payload_and_forged_signature_fail(signed, keys):
+    signed.chain[5]["record_payload"]["amount"] = -1
+    signed.chain[6]["signature"] = "ed25519:AAAA"
+    ok, problems = verify(signed, keys[1])
+    assert not ok
+    assert "entry 5: signature missing or invalid" in problems
+    assert "entry 6: signature missing or invalid" in problems
+
+
+def test_wrong_key_fails(signed, tmp_path):
+    _, other_pub = ledger_signing.generate_key(tmp_path / "other.pem")
+    ok, _ = verify(signed, other_pub)
+    assert not ok
+
+
+def test_cache_skips_unchanged_chunks_and_rechecks_changed_ones(signed, keys, tmp_path, verify_calls):
+    cache, secret = tmp_path / "cache.json", b"s" * 32
+    assert verify(signed, keys[1], cache_path=cache, cache_secret=secret) == (True, [])
+    assert len(verify_calls) == 3
+
+    verify_calls.clear()
+    assert verify(signed, keys[1], cache_path=cache, cache_secret=secret) == (True, [])
+    assert verify_calls == []
+
+    signed.chain[5]["signature"] = signed.chain[4]["signature"]
+    verify_calls.clear()
+    ok, problems = verify(signed, keys[1], cache_path=cache, cache_secret=secret)
+    assert not ok and problems == ["entry 5: signature missing or invalid"]
+    assert verify_calls == [4]
+
+
+def test_forged_cache_ranges_are_ignored(signed, keys, tmp_path, verify_calls):
+    cache, secret = tmp_path / "cache.json", b"s" * 32
+    verify(signed, keys[1], cache_path=cache, cache_secret=secret)
+
+    # Forge payloads and signatures, then recompute the range digests the way an
+    # attacker could (without the verifier's secret).
+    for entry in signed.chain[1:]:
+        entry["record_payload"] = {"forged": True}
+        entry["signature"] = "ed25519:AAAA"
+    data = json.loads(cache.read_text())
+    for rng in data["ranges"]:
+        chunk = signed.chain[rng["start"]:rng["end"] + 1]
+        rng["digest"] = ledger_signing._chunk_digest(
+            [ledger_signing.entry_digest(e) for e in chunk], [e.get("signature") for e in chunk])
+    cache.write_text(json.dumps(data))
+
+    ok, _ = verify(signed, keys[1], cache_path=cache, cache_secret=secret)
+    assert not ok
+    ok, _ = verify(signed, keys[1], cache_path=cache, cache_secret=b"x" * 32)
+    assert not ok
+
+
+def test_cache_from_another_secret_is_not_trusted(signed, keys, tmp_path, verify_calls):
+    cache = tmp_path / "cache.json"
+    verify(signed, keys[1], cache_path=cache, cache_secret=b"a" * 32)
+    verify_calls.clear()
+    assert verify(signed, keys[1], cache_path=cache, cache_secret=b"b" * 32) == (True, [])
+    assert len(verify_calls) == 3
+
+
+def test_default_cache_path_is_outside_the_ledger_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    path = ledger_signing.default_cache_path(tmp_path / "ledger.jsonl")
+    assert path.parent == tmp_path / "xdg" / "paygod" / "sigcache"
+    secret = ledger_signing.local_cache_secret()
+    assert ledger_signing.local_cache_secret() == secret
+    assert (path.parent / "sigcache.key").stat().st_mode & 0o077 == 0
+
+
+def test_append_many_signs_only_the_new_batch(keys, monkeypatch):
+    seen = []
+    real = ledger_signing.sign_entries
+
+    def counting(entries, *args, **kwargs):
+        seen.append(len(entries))
+        return real(entries, *args, **kwargs)
+
+    monkeypatch.setattr(ledger_signing, "sign_entries", counting)
+    ledger = Ledger()
+    for batch in range(5):
+        records = [("observation", {"batch": batch, "n": n}) for n in range(10)]
+        ledger_signing.append_many(ledger, records, keys[0], workers=1, chunk_size=CHUNK)
+    assert seen == [11, 10, 10, 10, 10]  # the first batch also signs the genesis entry
+    assert verify(ledger, keys[1]) == (True, [])
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tools" / "dev" / "mock"))
+
+import pytest  # noqa: E402
+
+pytest.importorskip("yaml")
+pytest.importorskip("jcs")
+
+import hashlib  # noqa: E402
+
+import jcs  # noqa: E402
+from load_harness import build_receipt, percentile  # noqa: E402
+from simulate_ledger import canonical_json  # noqa: E402
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 25) == 1.0
+    assert percentile([], 50) == 0.0
+
+
+def test_receipt_canonical_hash_is_jcs_not_the_cache_key():
+    # Non-ASCII text and a float with an exponent canonicalize differently
+    # under JCS than under sorted-key json.dumps.
+    observation = {"name": "caf\u00e9", "score": 1e21, "nested": {"b": 1, "a": [2.5, 1.0]}}
+    entry = {"entry_index": 0, "record_hash": "sha256:00"}
+    receipt = build_receipt(Path("packs/core/x"), "d" * 64, observation, {"decision": "ALLOW"}, entry)
+    expected = hashlib.sha256(jcs.canonicalize(observation)).hexdigest()
+    assert receipt["input"]["canonical_hash"] == expected
+    assert expected != hashlib.sha256(canonical_json(observation).encode("utf-8")).hexdigest()
@@ -0,0 +1,83 @@
+import hashlib
+import os
+
+import pytest
+
+import pack_digest
+from pack_digest import PackDigester, build_levels, leaf_hash, merkle_root, update_path
+
+OLD_NS = 1_600_000_000 * 10 ** 9
+
+
+@pytest.fixture
+def pack(tmp_path):
+    root = tmp_path / "pack"
+    for rel in ("pack.yaml", "manifest.json", "rules/a.rego", "rules/b.rego", "tests/cases.yaml"):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"content of {rel}\n")
+        os.utime(path, ns=(OLD_NS, OLD_NS))  # outside the racy window
+    return root
+
+
+def full_root(pack_dir):
+    return PackDigester(cache_path=None).digest(pack_dir).root
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 8, 13])
+def test_update_path_matches_a_rebuild(n):
+    leaves = [leaf_hash(f"f{i}", hashlib.sha256(bytes([i])).digest()) for i in range(n)]
+    levels = build_levels(leaves)
+    for i in range(n):
+        leaves[i] = leaf_hash(f"f{i}", hashlib.sha256(b"changed" + bytes([i])).digest())
+        hashed = update_path(levels, i, leaves[i])
+        assert merkle_root(levels) == merkle_root(build_levels(leaves))
+        assert hashed <= max(1, n.bit_length())
+
+
+def test_one_edit_rehashes_one_file(pack, tmp_path):
+    digester = PackDigester(tmp_path / "cache.json")
+    first = digester.digest(pack)
+    assert first.rehashed == 5
+    assert digester.digest(pack).rehashed == 0
+
+    target = pack / "rules" / "a.rego"
+    target.write_text("edited\n")
+    os.utime(target, ns=(OLD_NS + 10 ** 9, OLD_NS + 10 ** 9))
+    second = digester.digest(pack)
+    assert (second.rehashed, second.nodes_hashed) == (1, 3)
+    assert second.root == full_root(pack) != first.root
+
+
+def test_racy_mtime_is_rehashed_until_it_ages(pack, tmp_path, monkeypatch):
+    digester = PackDigester(tmp_path / "cache.json")
+    target = pack / "pack.yaml"
+    now = OLD_NS + 100 * pack_digest.RACY_WINDOW_NS
+    target.write_text("fresh\n")
+    os.utime(target, ns=(now, now))
+    monkeypatch.setattr(pack_digest.time, "time_ns", lambda: now + 1)
+    digester.digest(pack)
+    # Cached within RACY_WINDOW_NS of its mtime: an edit in the same tick could go unseen.
+    assert digester.digest(pack).rehashed == 1
+
+    monkeypatch.setattr(pack_digest.time, "time_ns", lambda: now + pack_digest.RACY_WINDOW_NS + 1)
+    digester.digest(pack)
+    assert digester.digest(pack).rehashed == 0
+
+
+def test_confirm_reports_content_changed_under_an_unchanged_stat(pack, tmp_path, capsys):
+    cache = tmp_path / "cache.json"
+    digester = PackDigester(cache)
+    before = digester.digest(pack).root
+    digester.save()
+
+    target = pack / "manifest.json"
+    st = target.stat()
+    target.write_text("X" * st.st_size)
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert PackDigester(cache).digest(pack).root == before  # trusted by stat
+    assert pack_digest.main([str(pack), "--cache", str(cache), "--confirm", "--json"]) == 1
+    out = capsys.readouterr().out
+    assert '"cache_mismatches": 1' in out
+    assert PackDigester(cache).digest(pack).root == full_root(pack) != before
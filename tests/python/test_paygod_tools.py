@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("jcs")
+pytest.importorskip("jsonschema")
+pytest.importorskip("yaml")
+if not hasattr(socket, "AF_UNIX") or not hasattr(os, "getuid"):
+    pytest.skip("the daemon needs Unix sockets", allow_module_level=True)
+
+import paygod_tools  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[2]
+SCHEMA = "contracts/schemas/observation.schema.json"
+SAMPLE = "tests/fixtures/observation.sample.json"
+
+
+def _wait_for(path: Path, proc: subprocess.Popen, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while not path.exists():
+        assert proc.poll() is None, proc.stderr.read()
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """A daemon serving a private copy of tools/*.py, so the test can edit its sources."""
+    tools = tmp_path / "tools"
+    tools.mkdir()
+    for src in (ROOT / "tools").glob("*.py"):
+        shutil.copy2(src, tools / src.name)
+    run = tmp_path / "run"
+    run.mkdir(mode=0o700)
+    sock = run / "d.sock"
+    proc = subprocess.Popen([sys.executable, str(tools / "paygod_tools.py"), "daemon", "--socket", str(sock)],
+                            stderr=subprocess.PIPE, text=True)
+    _wait_for(sock, proc)
+    yield tools, sock, proc
+    proc.terminate()
+    proc.wait(timeout=10)
+    proc.stderr.close()
+
+
+def _run(capsys, runner, argv):
+    code = runner(argv)
+    out, err = capsys.readouterr()
+    return code, out, err
+
+
+@pytest.mark.parametrize("argv", [
+    ["hash", SAMPLE, SCHEMA],
+    ["validate", "-s", SCHEMA, "-i", SAMPLE],
+    ["validate", "-s", SCHEMA, "-i", SCHEMA],
+    ["validate", "-s", SCHEMA],
+])
+def test_daemon_output_matches_in_process(daemon, capsys, monkeypatch, argv):
+    _, sock, _ = daemon
+    monkeypatch.chdir(ROOT)
+    remote = _run(capsys, lambda a: paygod_tools.run_remote(a, str(sock)), argv)
+    local = _run(capsys, paygod_tools.run_local, argv)
+    assert remote[0] is not None
+    assert remote == local
+
+
+def test_daemon_restarts_when_a_tool_source_changes(daemon, capsys, monkeypatch):
+    tools, sock, proc = daemon
+    monkeypatch.chdir(ROOT)
+    argv = ["hash", SAMPLE]
+    expected = _run(capsys, paygod_tools.run_local, argv)
+    assert _run(capsys, lambda a: paygod_tools.run_remote(a, str(sock)), argv) == expected
+
+    with open(tools / "instrument.py", "a") as f:
+        f.write("\n# edited\n")
+    code, out, err = _run(capsys, lambda a: paygod_tools.run_remote(a, str(sock)), argv)
+    assert code is None and out == ""
+    assert "restarting" in err
+
+    # The daemon re-executes itself (same pid) and serves the edited sources.
+    deadline = time.monotonic() + 15
+    while True:
+        code, out, err = _run(capsys, lambda a: paygod_tools.run_remote(a, str(sock)), argv)
+        if code is not None:
+            break
+        assert proc.poll() is None
+        assert time.monotonic() < deadline, "daemon did not come back"
+        time.sleep(0.05)
+    assert (code, out, err) == expected
+    assert json.loads(out)["file"] == SAMPLE
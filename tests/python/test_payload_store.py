@@ -0,0 +1,40 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from payload_store import PayloadStore
+from simulate_ledger import Ledger
+
+SCHEMA = Path(__file__).resolve().parents[2] / "contracts" / "schemas" / "ledger_entry.schema.json"
+
+
+@pytest.fixture
+def stored(tmp_path):
+    ledger = Ledger(store=PayloadStore(tmp_path / "payloads"))
+    for n in range(3):
+        ledger.append("observation", {"n": n})
+    return ledger
+
+
+def test_store_mode_entries_match_the_ledger_entry_schema(stored):
+    jsonschema = pytest.importorskip("jsonschema")
+    schema = json.loads(SCHEMA.read_text(encoding="utf-8"))
+    for entry in stored.chain[1:]:
+        assert "record_payload" not in entry
+        jsonschema.validate(entry, schema)
+
+    both = dict(stored.chain[1], record_payload={"n": 0})
+    with pytest.raises(jsonschema.ValidationError):
+        jsonschema.validate(both, schema)
+
+
+def test_check_payloads_reports_unreadable_references(stored, tmp_path):
+    assert stored.verify(check_payloads=True) == (True, -1)
+
+    detached = Ledger.from_chain(stored.chain)
+    assert detached.verify() == (True, -1)
+    assert detached.verify(check_payloads=True) == (False, 1)
+
+    stored.chain[2]["record_ref"]["segment"] = 99
+    assert stored.verify(check_payloads=True) == (False, 2)
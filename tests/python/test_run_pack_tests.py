@@ -0,0 +1,80 @@
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tools" / "dev" / "mock"))
+
+import pytest  # noqa: E402
+
+pytest.importorskip("yaml")
+
+from run_pack_tests import build_report, discover_packs, run_all, write_junit  # noqa: E402
+
+CASES = """\
+cases:
+  - name: deny-nested-and-regex
+    input: {value: 95}
+    expected:
+      decision: deny
+      matchers:
+        - {field: payload.risk_score, operator: gt, value: 0.5}
+        - {field: reason, operator: regex, value: "^Memory usage exceeds threshold of \\\\d+%$"}
+  - name: allow-nested-fails
+    input: {value: 10}
+    expected:
+      decision: allow
+      matchers:
+        - {field: payload.risk_score, operator: equals, value: 0.5}
+  - name: regex-fails
+    input: {value: 10}
+    expected:
+      decision: allow
+      matchers:
+        - {field: reason, operator: regex, value: "exceeds"}
+  - name: missing-nested-field
+    input: {value: 95}
+    expected:
+      decision: deny
+      matchers:
+        - {field: payload.missing.depth, operator: equals, value: 1}
+  - name: wrong-decision
+    input: {value: 95}
+    expected:
+      decision: allow
+"""
+
+
+@pytest.fixture
+def repo(tmp_path):
+    pack = tmp_path / "packs" / "core" / "memory-waste-guardrails"
+    (pack / "tests").mkdir(parents=True)
+    (pack / "tests" / "cases.yaml").write_text(CASES, encoding="utf-8")
+    draft = tmp_path / "packs" / "_drafts" / "draft-pack" / "tests"
+    draft.mkdir(parents=True)
+    (draft / "cases.yaml").write_text("cases: []\n", encoding="utf-8")
+    return tmp_path
+
+
+def test_discover_skips_drafts_unless_asked(repo):
+    assert [p.name for p in discover_packs(repo, False)] == ["memory-waste-guardrails"]
+    assert [p.name for p in discover_packs(repo, True)] == ["draft-pack", "memory-waste-guardrails"]
+
+
+def test_nested_field_and_regex_matchers(repo, tmp_path):
+    results = run_all(discover_packs(repo, False), workers=2)
+    by_name = {r["case"]: r for r in results}
+    assert by_name["deny-nested-and-regex"]["status"] == "passed"
+    assert by_name["allow-nested-fails"]["status"] == "failed"
+    assert "payload.risk_score" in by_name["allow-nested-fails"]["message"]
+    assert by_name["regex-fails"]["status"] == "failed"
+    assert by_name["missing-nested-field"]["status"] == "failed"
+    assert by_name["wrong-decision"]["message"].startswith("expected decision 'allow', got 'deny'")
+
+    report = build_report(results, 0.01, slowest=2)
+    assert (report["ok"], report["total"], report["passed"], report["failed"]) == (False, 5, 1, 4)
+    assert len(report["slowest"]) == 2
+
+    junit = tmp_path / "results.xml"
+    write_junit(report, junit)
+    suite = ET.parse(junit).getroot().find("testsuite")
+    assert (suite.get("tests"), suite.get("failures")) == ("5", "4")
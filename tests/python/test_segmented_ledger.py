@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from segmented_ledger import SegmentedLedger, _file_sha256
+from simulate_ledger import canonical_json, entry_hash, sha256
+
+
+@pytest.fixture
+def seg_dir(tmp_path):
+    with SegmentedLedger(tmp_path, segment_entries=8, frame_entries=3) as ledger:
+        for n in range(26):
+            ledger.append("observation", {"n": n})
+        assert len(ledger.seals) == 3
+        assert ledger.verify() == (True, [])
+        assert ledger.verify(full=True) == (True, [])
+        head = entry_hash(ledger.ledger.chain[-1])
+    return tmp_path, head
+
+
+def test_reads_and_reopen(seg_dir):
+    path, head = seg_dir
+    with SegmentedLedger(path, segment_entries=8, frame_entries=3) as ledger:
+        assert entry_hash(ledger.ledger.chain[-1]) == head
+        assert ledger.get(3)["record_payload"] == {"n": 2}
+        first_after_seal = ledger.get(ledger.seals[0]["last_index"] + 1)
+        assert first_after_seal["record_payload"]["kind"] == "segment_seal"
+        assert ledger.verify() == (True, [])
+
+
+def test_flipped_byte_in_sealed_segment_fails_default_verify(seg_dir):
+    path, _ = seg_dir
+    zseg = path / "seg-000000.zseg"
+    data = bytearray(zseg.read_bytes())
+    data[len(data) // 2] ^= 0x01
+    zseg.write_bytes(bytes(data))
+    with SegmentedLedger(path) as ledger:
+        ok, problems = ledger.verify()
+    assert not ok
+    assert "segment 0: digest mismatch" in problems
+
+
+def test_rewritten_segment_with_recomputed_seals_fails(seg_dir):
+    path, head = seg_dir
+    # Rewrite segment 1 and recompute every later seal's size, digest and
+    # prev_seal_hash, as someone without access to the head anchor could.
+    seals = [json.loads(p.read_text()) for p in sorted(path.glob("seg-*.seal.json"))]
+    (path / "seg-000001.zseg").write_bytes((path / "seg-000001.zseg").read_bytes() + b"x")
+    prev = seals[0]
+    for seal in seals[1:]:
+        zseg = path / f"seg-{seal['segment']:06d}.zseg"
+        seal["size"] = zseg.stat().st_size
+        seal["digest"] = _file_sha256(zseg)
+        seal["prev_seal_hash"] = sha256(canonical_json(prev))
+        (path / f"seg-{seal['segment']:06d}.seal.json").write_text(json.dumps(seal))
+        prev = seal
+
+    with SegmentedLedger(path) as ledger:
+        ok, problems = ledger.verify()
+        assert not ok
+        assert problems == ["tail: does not commit to the seal of segment 2"]
+        assert entry_hash(ledger.ledger.chain[-1]) == head
+
+
+def test_broken_seal_chain_and_tail_are_reported(seg_dir):
+    path, _ = seg_dir
+    seal_path = path / "seg-000001.seal.json"
+    seal = json.loads(seal_path.read_text())
+    seal["prev_seal_hash"] = "sha256:" + "0" * 64
+    seal_path.write_text(json.dumps(seal))
+    tail = sorted(path.glob("seg-*.jsonl"))[-1]
+    lines = tail.read_text().splitlines(keepends=True)
+    entry = json.loads(lines[-1])
+    entry["prev_hash"] = "sha256:" + "1" * 64
+    tail.write_text("".join(lines[:-1]) + json.dumps(entry) + "\n")
+
+    with SegmentedLedger(path) as ledger:
+        ok, problems = ledger.verify()
+    assert not ok
+    assert "segment 1: seal chain broken" in problems
+    assert any(p.startswith("tail: chain broken at entry") for p in problems)
+
+
+def test_reopen_after_crash_between_seal_and_commit(tmp_path):
+    with SegmentedLedger(tmp_path, segment_entries=4) as ledger:
+        for n in range(3):
+            ledger.append("observation", {"n": n})
+    (tmp_path / "seg-000001.jsonl").unlink()
+    with SegmentedLedger(tmp_path, segment_entries=4) as ledger:
+        assert ledger.verify() == (True, [])
+        assert ledger.get(4)["record_payload"]["kind"] == "segment_seal"
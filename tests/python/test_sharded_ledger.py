@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from sharded_ledger import ShardedLedger
+
+SCHEMA = Path(__file__).resolve().parents[2] / "contracts" / "schemas" / "ledger_entry.schema.json"
+
+
+@pytest.fixture
+def ledger():
+    ledger = ShardedLedger(shards=3, partition="subject", anchor_every=0)
+    records = [("observation", {"subject": {"id": f"s-{n % 7}"}, "n": n}) for n in range(30)]
+    ledger.append_many(records[:15], workers=1)
+    ledger.append_many(records[15:], workers=1)
+    assert ledger.verify() == (True, [])
+    return ledger
+
+
+def heads(ledger, anchor=-1):
+    return ledger.anchors.chain[anchor]["record_payload"]["shards"]
+
+
+def test_save_load_roundtrip_and_anchor_schema(ledger, tmp_path):
+    ledger.save(tmp_path)
+    assert ShardedLedger.load(tmp_path).verify() == (True, [])
+    jsonschema = pytest.importorskip("jsonschema")
+    schema = json.loads(SCHEMA.read_text(encoding="utf-8"))
+    for anchor in ledger.anchors.chain[1:]:
+        jsonschema.validate(anchor, schema)
+
+
+def test_broken_shard_chain(ledger):
+    ledger.shards[1].chain[2]["record_payload"]["n"] = -1
+    ok, problems = ledger.verify()
+    assert not ok
+    assert "shard 1: chain broken at entry 3" in problems
+
+
+def test_moved_and_missing_anchored_heads(ledger):
+    heads(ledger, 1)[0]["entry_index"] = heads(ledger, 2)[0]["entry_index"] + 1
+    ledger.shards[2].chain.pop()
+    ok, problems = ledger.verify()
+    assert not ok
+    assert any("shard 0 moved backwards" in p for p in problems)
+    assert any("shard 2 entry" in p and "missing" in p for p in problems)
+
+
+@pytest.mark.parametrize("tamper, expected", [
+    (lambda h: h[0].update(shard=5), "invalid or repeated shard 5"),
+    (lambda h: h[1].update(shard=0), "invalid or repeated shard 0"),
+    (lambda h: h[0].pop("entry_index"), "shard 0 head is missing entry_index or entry_hash"),
+    (lambda h: h.__setitem__(0, "garbage"), "malformed shard head"),
+    (lambda h: h.pop(), "expected 3 shard heads, got 2"),
+])
+def test_bad_anchor_payload_is_reported(ledger, tamper, expected):
+    tamper(heads(ledger))
+    ok, problems = ledger.verify()
+    assert not ok
+    assert any(p.endswith(expected) for p in problems), problems
+
+
+def test_non_anchor_entry_in_anchor_chain(ledger):
+    ledger.anchors.append("observation", {"shards": []})
+    ok, problems = ledger.verify()
+    assert problems == [f"anchor {ledger.anchors.chain[-1]['entry_index']}: not a shard anchor"]
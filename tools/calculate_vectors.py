@@ -1,6 +1,16 @@
+import argparse
 import json
 import hashlib
 import sys
+from pathlib import Path
+
+import instrument
+
+ROOT = Path(__file__).resolve().parents[1]
+VECTORS_DIR = ROOT / "spec" / "test-vectors"
+STATE_PATH = ROOT / ".paygod-cache" / "vectors-state.json"
+# Vectors owned by this generator; canonical-json-fuzz.json is written by canonical_fuzz.py.
+DEFAULT_FILES = ("canonical-json.json", "ledger-chaining.json")
 
 # RFC 8785 (JCS) Compliant Implementation
 def jcs_compliant_dump(obj):
@@ -30,37 +40,79 @@ def jcs_compliant_dump(obj):
     return str(obj) # Ints
 
 def calculate_hash(obj):
-    canonical_str = jcs_compliant_dump(obj)
+    with instrument.stage("canonicalize"):
+        canonical_str = jcs_compliant_dump(obj)
     data = canonical_str.encode('utf-8')
-    return hashlib.sha256(data).hexdigest()
+    instrument.count("bytes", len(data), stage="hash")
+    with instrument.stage("hash"):
+        return hashlib.sha256(data).hexdigest()
+
+def _input_key(obj):
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, ensure_ascii=True).encode('utf-8')).hexdigest()
+
+def _generator_digest():
+    # Any edit to this file (i.e. to jcs_compliant_dump) invalidates the state.
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
 
-def process_file(filepath):
+def load_state(path):
+    """Memo of input digest -> [canonical, hash], valid for one generator version."""
+    if path.exists():
+        state = json.loads(path.read_text(encoding='utf-8'))
+        if state.get('generator') == _generator_digest():
+            return state
+    return {'generator': _generator_digest(), 'cases': {}}
+
+def process_file(filepath, state=None, force=False):
+    """
+    Fill expected_canonical/expected_hash for every case. Cases whose input is
+    already in `state` and whose expectations match it are left untouched; the
+    file is only rewritten when something changed. Returns the number of
+    regenerated cases.
+    """
     print(f"Processing {filepath}...")
-    with open(filepath, 'r') as f:
+    with open(filepath, 'r', encoding='utf-8') as f:
         vectors = json.load(f)
-    
-    updated_vectors = []
+    memo = state['cases'] if state is not None else {}
+
+    changed = 0
     for case in vectors:
         input_data = case['input']
-        
-        expected_canonical = jcs_compliant_dump(input_data)
-        expected_hash = calculate_hash(input_data)
-        
-        case['expected_canonical'] = expected_canonical
-        case['expected_hash'] = expected_hash
-        updated_vectors.append(case)
-        
+        key = _input_key(input_data)
+        known = memo.get(key)
+        if not force and known is not None and [case.get('expected_canonical'), case.get('expected_hash')] == known:
+            continue
+
+        if known is None or force:
+            known = [jcs_compliant_dump(input_data), calculate_hash(input_data)]
+            memo[key] = known
+        if [case.get('expected_canonical'), case.get('expected_hash')] == known:
+            continue
+        case['expected_canonical'], case['expected_hash'] = known
+        changed += 1
         print(f"  - {case['description']}")
 
-    with open(filepath, 'w') as f:
-        json.dump(updated_vectors, f, indent=2, ensure_ascii=False)
-    print("Done.\n")
+    if changed:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(vectors, f, indent=2, ensure_ascii=False)
+    print(f"Done ({changed} of {len(vectors)} cases regenerated).\n")
+    return changed
 
-if __name__ == "__main__":
-    files = [
-        "/home/ubuntu/الحمدلله/paygod-kernel/spec/test-vectors/canonical-json.json",
-        "/home/ubuntu/الحمدلله/paygod-kernel/spec/test-vectors/ledger-chaining.json"
-    ]
-    
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate expected values in spec test vectors")
+    parser.add_argument("files", nargs="*", help=f"Vector files (default: {', '.join(DEFAULT_FILES)})")
+    parser.add_argument("--force", action="store_true", help="Regenerate every case")
+    parser.add_argument("--state", default=str(STATE_PATH), help="Incremental state file")
+    args = parser.parse_args(argv)
+
+    state_path = Path(args.state)
+    state = load_state(state_path)
+    files = args.files or [str(VECTORS_DIR / name) for name in DEFAULT_FILES]
     for f in files:
-        process_file(f)
+        process_file(f, state, force=args.force)
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps(state), encoding='utf-8')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
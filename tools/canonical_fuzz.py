@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Differential fuzzing of the JSON canonicalizers.
+
+Generates random and edge-case JSON documents, canonicalizes and hashes each
+one with every implementation, and reports any document on which they
+disagree. Documents include:
+- extreme floats (subnormals, 1e21 boundaries, -0.0, random bit patterns)
+- big integers
+- control characters, escapes and surrogate pairs (astral characters, also in keys)
+- deep nesting
+- huge objects
+
+Work is split into seeded chunks on a process pool, so a run is reproducible
+from --seed. Each disagreement class (which implementations agree with which)
+is minimized to a small document. --record appends the minimized documents to
+spec/test-vectors/canonical-json-fuzz.json, with expectations from the
+reference implementation (jcs, as used by verify_spec.py).
+
+Implementations:
+  jcs                  the `jcs` package (RFC 8785 reference)
+  jcs_compliant_dump   calculate_vectors.jcs_compliant_dump
+  canonical_json       simulate_ledger.canonical_json (ledger hashing)
+  --impl name=module:function adds another one (returning str or bytes),
+  e.g. a new fast path.
+
+Usage:
+  python tools/canonical_fuzz.py --docs 1000000
+  python tools/canonical_fuzz.py --docs 200000 --impls jcs,jcs_compliant_dump --record
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import math
+import os
+import random
+import struct
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+FUZZ_VECTORS = ROOT / "spec" / "test-vectors" / "canonical-json-fuzz.json"
+
+BUILTIN_IMPLS = {
+    "jcs": "jcs:canonicalize",
+    "jcs_compliant_dump": "calculate_vectors:jcs_compliant_dump",
+    "canonical_json": "simulate_ledger:canonical_json",
+}
+REFERENCE = "jcs"
+
+EDGE_FLOATS = [
+    0.0, -0.0, 1.0, -1.0, 0.1, 0.5, 1.5, 1e-7, 1e-6, 1e20, 1e21, 1e22, 1e-324, 5e-324, 2.2250738585072014e-308,
+    1.7976931348623157e308, 9007199254740992.0, 9007199254740993.0, 0.30000000000000004, 123456789012345680000.0,
+    333333333.3333333, 4.35, 1e16, 1e15,
+]
+EDGE_INTS = [0, 1, -1, 2**31 - 1, -2**31, 2**53 - 1, 2**53, 2**53 + 1, -2**53, 2**63 - 1, 2**64, 10**21, 10**30]
+CHAR_CLASSES = [
+    (0x20, 0x7E),      # printable ASCII
+    (0x00, 0x1F),      # control characters
+    (0x7F, 0xFF),      # DEL and Latin-1
+    (0x100, 0xD7FF),   # BMP below the surrogate range
+    (0xE000, 0xFFFD),  # BMP above the surrogate range
+    (0x10000, 0x10FFFF),  # astral: encoded as surrogate pairs in UTF-16
+]
+SPECIAL_CHARS = '"\\/\b\f\n\r\t\x7f\u2028\u2029\ufeff\u00e9e\u0301'
+
+
+# --- implementations ------------------------------------------------------------
+
+def load_impls(specs: Dict[str, str]) -> Dict[str, Callable]:
+    """Resolve name -> "module:function"; implementations that fail to import are skipped."""
+    tools_dir = str(Path(__file__).resolve().parent)
+    if tools_dir not in sys.path:
+        sys.path.insert(0, tools_dir)
+    impls = {}
+    for name, spec in specs.items():
+        module, _, func = spec.partition(":")
+        try:
+            impls[name] = getattr(importlib.import_module(module), func)
+        except (ImportError, AttributeError) as e:
+            print(f"skipping {name}: {e}", file=sys.stderr)
+    return impls
+
+
+def run_impl(fn: Callable, doc) -> Tuple[str, Optional[bytes]]:
+    """Return (sha256 hex or "error:<type>", canonical bytes)."""
+    try:
+        out = fn(doc)
+        data = out if isinstance(out, bytes) else out.encode("utf-8")
+    except (ValueError, TypeError, OverflowError, RecursionError, UnicodeError) as e:
+        return f"error:{type(e).__name__}", None
+    return hashlib.sha256(data).hexdigest(), data
+
+
+def classify(results: Dict[str, str]) -> Optional[str]:
+    """Disagreement class, e.g. "canonical_json | jcs,jcs_compliant_dump"; None when all agree."""
+    groups: Dict[str, List[str]] = {}
+    for name, digest in results.items():
+        groups.setdefault(digest, []).append(name)
+    if len(groups) <= 1:
+        return None
+    return " | ".join(sorted(",".join(sorted(g)) for g in groups.values()))
+
+
+# --- generation --------------------------------------------------------------------
+
+class DocGenerator:
+    def __init__(self, rng: random.Random, max_depth: int = 256, huge_keys: int = 5000, huge_every: int = 500):
+        self.rng = rng
+        self.max_depth = max_depth
+        self.huge_keys = huge_keys
+        self.huge_every = huge_every
+
+    def float_(self) -> float:
+        r = self.rng.random()
+        if r < 0.4:
+            return self.rng.choice(EDGE_FLOATS) * self.rng.choice((1, -1))
+        if r < 0.7:
+            while True:
+                value = struct.unpack("<d", struct.pack("<Q", self.rng.getrandbits(64)))[0]
+                if math.isfinite(value):
+                    return value
+        return self.rng.uniform(-1, 1) * 10 ** self.rng.randint(-30, 30)
+
+    def int_(self) -> int:
+        if self.rng.random() < 0.5:
+            return self.rng.choice(EDGE_INTS)
+        return self.rng.randint(-2**63, 2**63)
+
+    def string(self, max_len: int = 12) -> str:
+        chars = []
+        for _ in range(self.rng.randint(0, max_len)):
+            if self.rng.random() < 0.15:
+                chars.append(self.rng.choice(SPECIAL_CHARS))
+            else:
+                lo, hi = self.rng.choice(CHAR_CLASSES)
+                chars.append(chr(self.rng.randint(lo, hi)))
+        return "".join(chars)
+
+    def scalar(self):
+        r = self.rng.random()
+        if r < 0.3:
+            return self.float_()
+        if r < 0.5:
+            return self.int_()
+        if r < 0.85:
+            return self.string()
+        return self.rng.choice((True, False, None))
+
+    def value(self, depth: int):
+        r = self.rng.random()
+        if depth <= 0 or r < 0.5:
+            return self.scalar()
+        if r < 0.75:
+            return [self.value(depth - 1) for _ in range(self.rng.randint(0, 6))]
+        return {self.string(6): self.value(depth - 1) for _ in range(self.rng.randint(0, 6))}
+
+    def nested(self):
+        doc = self.scalar()
+        for _ in range(self.rng.randint(32, self.max_depth)):
+            doc = [doc] if self.rng.random() < 0.5 else {self.string(3): doc}
+        return doc
+
+    def huge(self):
+        return {self.string(8) + str(i): self.scalar() for i in range(self.rng.randint(self.huge_keys // 4, self.huge_keys))}
+
+    def document(self, n: int):
+        if self.huge_every and n % self.huge_every == self.huge_every - 1:
+            return self.huge()
+        if n % 50 == 49:
+            return self.nested()
+        return self.value(4)
+
+
+# --- workers ---------------------------------------------------------------------------
+
+_IMPLS: Dict[str, Callable] = {}
+
+
+def _init_worker(specs: Dict[str, str]) -> None:
+    global _IMPLS
+    _IMPLS = load_impls(specs)
+
+
+def _run_chunk(seed: str, start: int, count: int, gen_opts: dict, keep: int) -> dict:
+    gen = DocGenerator(random.Random(f"{seed}-{start}"), **gen_opts)
+    seconds = Counter()
+    errors = Counter()
+    classes = Counter()
+    samples = []
+    total_bytes = 0
+    for n in range(start, start + count):
+        doc = gen.document(n)
+        results = {}
+        for name, fn in _IMPLS.items():
+            t0 = time.perf_counter()
+            digest, data = run_impl(fn, doc)
+            seconds[name] += time.perf_counter() - t0
+            results[name] = digest
+            if data is None:
+                errors[name] += 1
+            elif name == REFERENCE or len(results) == 1:
+                total_bytes += len(data)
+        cls = classify(results)
+        if cls is not None:
+            classes[cls] += 1
+            if sum(1 for c, _ in samples if c == cls) < keep:
+                samples.append((cls, doc))
+    return {"docs": count, "bytes": total_bytes, "seconds": dict(seconds), "errors": dict(errors),
+            "classes": dict(classes), "samples": samples}
+
+
+# --- minimization ------------------------------------------------------------------------
+
+def _shrink(value):
+    """Yield strictly smaller variants of a JSON value, coarsest first."""
+    if isinstance(value, dict):
+        items = list(value.items())
+        if len(items) > 4:
+            half = len(items) // 2
+            yield dict(items[:half])
+            yield dict(items[half:])
+        for _, child in items:
+            yield child
+        for i in range(len(items)):
+            yield dict(items[:i] + items[i + 1:])
+        for i, (key, child) in enumerate(items):
+            for smaller in _shrink(key):
+                if smaller not in value:
+                    yield dict(items[:i] + [(smaller, child)] + items[i + 1:])
+            for smaller in _shrink(child):
+                yield dict(items[:i] + [(key, smaller)] + items[i + 1:])
+    elif isinstance(value, list):
+        if len(value) > 4:
+            half = len(value) // 2
+            yield value[:half]
+            yield value[half:]
+        for child in value:
+            yield child
+        for i in range(len(value)):
+            yield value[:i] + value[i + 1:]
+        for i, child in enumerate(value):
+            for smaller in _shrink(child):
+                yield value[:i] + [smaller] + value[i + 1:]
+    elif isinstance(value, str) and len(value) > 1:
+        half = len(value) // 2
+        yield value[:half]
+        yield value[half:]
+        for ch in value:
+            yield ch
+
+
+def minimize(doc, predicate: Callable[[object], bool], budget: int = 5000):
+    """Greedy delta debugging: keep taking the first smaller variant that still fails."""
+    calls = 0
+    progress = True
+    while progress and calls < budget:
+        progress = False
+        for candidate in _shrink(doc):
+            calls += 1
+            if predicate(candidate):
+                doc = candidate
+                progress = True
+                break
+            if calls >= budget:
+                break
+    return doc
+
+
+def results_for(impls: Dict[str, Callable], doc) -> Dict[str, str]:
+    return {name: run_impl(fn, doc)[0] for name, fn in impls.items()}
+
+
+# --- vectors ------------------------------------------------------------------------------
+
+def to_vector(impls: Dict[str, Callable], cls: str, doc) -> Optional[dict]:
+    """A spec vector for a minimized document, or None if it cannot be stored faithfully."""
+    if REFERENCE not in impls:
+        return None
+    try:
+        reloaded = json.loads(json.dumps(doc, ensure_ascii=False))
+    except (ValueError, UnicodeError):
+        return None
+    if classify(results_for(impls, reloaded)) != cls:
+        return None
+    digest, data = run_impl(impls[REFERENCE], reloaded)
+    if data is None:
+        return None
+    return {
+        "description": f"Fuzz: {cls}",
+        "input": reloaded,
+        "expected_canonical": data.decode("utf-8"),
+        "expected_hash": digest,
+    }
+
+
+def record_vectors(path: Path, vectors: List[dict]) -> int:
+    existing = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+    known = {v["expected_hash"] for v in existing}
+    added = [v for v in vectors if v["expected_hash"] not in known and not known.add(v["expected_hash"])]
+    if added:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(existing + added, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    return len(added)
+
+
+# --- driver -------------------------------------------------------------------------------
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Differential fuzzing of JSON canonicalizers")
+    parser.add_argument("--docs", type=int, default=100000, help="Documents to generate")
+    parser.add_argument("--seed", default=None, help="Run seed (default: random)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=2000, help="Documents per task")
+    parser.add_argument("--impls", default=",".join(BUILTIN_IMPLS), help="Comma-separated builtin implementations")
+    parser.add_argument("--impl", action="append", default=[], metavar="NAME=MODULE:FUNC",
+                        help="Add an implementation (repeatable)")
+    parser.add_argument("--max-depth", type=int, default=256)
+    parser.add_argument("--huge-keys", type=int, default=5000)
+    parser.add_argument("--huge-every", type=int, default=500, help="One huge object per N documents (0 = never)")
+    parser.add_argument("--max-vectors", type=int, default=20, help="Disagreement classes to minimize")
+    parser.add_argument("--record", action="store_true", help=f"Append minimized vectors to {FUZZ_VECTORS.relative_to(ROOT)}")
+    parser.add_argument("--vectors-out", default=str(FUZZ_VECTORS))
+    args = parser.parse_args(argv)
+
+    specs = {name: BUILTIN_IMPLS[name] for name in args.impls.split(",") if name}
+    for item in args.impl:
+        name, _, spec = item.partition("=")
+        specs[name] = spec
+    impls = load_impls(specs)
+    if len(impls) < 2:
+        print("need at least two implementations to compare", file=sys.stderr)
+        return 2
+    specs = {name: specs[name] for name in impls}
+
+    seed = args.seed if args.seed is not None else str(random.SystemRandom().getrandbits(32))
+    gen_opts = {"max_depth": args.max_depth, "huge_keys": args.huge_keys, "huge_every": args.huge_every}
+    jobs = [(seed, start, min(args.chunk, args.docs - start), gen_opts, 1) for start in range(0, args.docs, args.chunk)]
+
+    totals = {"docs": 0, "bytes": 0}
+    seconds, errors, classes = Counter(), Counter(), Counter()
+    samples: Dict[str, object] = {}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(specs,)) as pool:
+        for result in pool.map(_run_chunk, *zip(*jobs)):
+            totals["docs"] += result["docs"]
+            totals["bytes"] += result["bytes"]
+            seconds.update(result["seconds"])
+            errors.update(result["errors"])
+            classes.update(result["classes"])
+            for cls, doc in result["samples"]:
+                samples.setdefault(cls, doc)
+    elapsed = time.perf_counter() - started
+
+    minimized, vectors = [], []
+    for cls, doc in list(samples.items())[:args.max_vectors]:
+        small = minimize(doc, lambda d, cls=cls: classify(results_for(impls, d)) == cls)
+        minimized.append({"class": cls, "input": small})
+        vector = to_vector(impls, cls, small)
+        if vector is not None:
+            vectors.append(vector)
+
+    report = {
+        "seed": seed,
+        "docs": totals["docs"],
+        "seconds": round(elapsed, 3),
+        "docs_per_s": round(totals["docs"] / elapsed, 1) if elapsed else None,
+        "reference_bytes": totals["bytes"],
+        "workers": args.workers or os.cpu_count(),
+        "implementations": {
+            name: {
+                "cpu_seconds": round(seconds[name], 3),
+                "docs_per_cpu_s": round(totals["docs"] / seconds[name], 1) if seconds[name] else None,
+                "errors": errors[name],
+            }
+            for name in impls
+        },
+        "disagreements": sum(classes.values()),
+        "classes": dict(classes.most_common()),
+        "minimized": minimized,
+    }
+    if args.record:
+        report["recorded"] = record_vectors(Path(args.vectors_out), vectors)
+    print(json.dumps(report, indent=2))
+    return 1 if classes else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Precomputed control coverage index: OSCAL catalog + profiles + framework mappings + pack tags.
+
+Sources (relative to the repository root):
+- controls/oscal/catalog.json      catalog controls from groups[].controls[] and nested controls[].
+                                   A control's props named "tag" add pack tags that evidence it.
+- controls/oscal/profiles/*.json   profile.imports[]: include-all, include-controls[].with-ids[],
+                                   exclude-controls[].with-ids[]
+- controls/mappings/*.yml          mappings: [{source: <framework id>, controls: [<control id>...],
+                                               tags: [<pack tag>...]}]
+- packs/**/pack.yaml               metadata.name and metadata.tags (_drafts with --include-drafts;
+                                   _template is skipped)
+
+A pack covers a control when one of its tags (case-insensitive) is:
+- the control id
+- a "tag" prop of the control
+- a tag listed by a mapping entry for the control
+- a mapping entry's framework id
+
+Every source is compiled into a small fragment stored in the index together
+with the sha256 of the file it came from. A rebuild re-parses only sources
+whose content hash changed (or that were added or removed), then recomputes
+the lookup tables from the fragments. The tables hold:
+- control -> packs
+- pack -> controls
+- framework id -> controls
+- profile -> coverage
+Each lookup is a single dict access.
+
+Index: .paygod-cache/control-index.json
+
+Usage:
+  python tools/control_index.py build
+  python tools/control_index.py packs <control-id>
+  python tools/control_index.py controls <pack-name>
+  python tools/control_index.py source <framework-id>
+  python tools/control_index.py coverage [<profile>]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_INDEX = ROOT / ".paygod-cache" / "control-index.json"
+INDEX_VERSION = 1
+
+
+# --- sources --------------------------------------------------------------------
+
+def discover_sources(root: Path, include_drafts: bool = False) -> Dict[str, str]:
+    """Relative POSIX path -> source kind, for every file that feeds the index."""
+    sources = {}
+    catalog = root / "controls" / "oscal" / "catalog.json"
+    if catalog.exists():
+        sources["controls/oscal/catalog.json"] = "catalog"
+    for p in sorted((root / "controls" / "oscal" / "profiles").glob("*.json")):
+        sources[p.relative_to(root).as_posix()] = "profile"
+    for pattern in ("*.yml", "*.yaml"):
+        for p in sorted((root / "controls" / "mappings").glob(pattern)):
+            sources[p.relative_to(root).as_posix()] = "mapping"
+    for p in sorted((root / "packs").rglob("pack.yaml")):
+        parts = [x.lower() for x in p.relative_to(root).parts]
+        if "_template" in parts or ("_drafts" in parts and not include_drafts):
+            continue
+        sources[p.relative_to(root).as_posix()] = "pack"
+    return sources
+
+
+def _walk_controls(controls, out: Dict[str, dict]) -> None:
+    for control in controls or []:
+        tags = sorted({str(p.get("value", "")).lower() for p in control.get("props", []) or []
+                       if p.get("name") == "tag" and p.get("value")})
+        out[control["id"]] = {"title": control.get("title", ""), "tags": tags}
+        _walk_controls(control.get("controls"), out)
+
+
+def _walk_groups(groups, out: Dict[str, dict]) -> None:
+    for group in groups or []:
+        _walk_controls(group.get("controls"), out)
+        _walk_groups(group.get("groups"), out)
+
+
+def _with_ids(selections) -> List[str]:
+    ids = []
+    for selection in selections or []:
+        ids.extend(selection.get("with-ids", []) or [])
+    return ids
+
+
+def compile_source(kind: str, data: bytes, rel: str) -> dict:
+    """Parse one source file into the fragment the index keeps for it."""
+    text = data.decode("utf-8-sig")
+    if kind == "catalog":
+        catalog = json.loads(text).get("catalog", {})
+        controls: Dict[str, dict] = {}
+        _walk_controls(catalog.get("controls"), controls)
+        _walk_groups(catalog.get("groups"), controls)
+        return {"title": catalog.get("metadata", {}).get("title", ""), "controls": controls}
+
+    if kind == "profile":
+        profile = json.loads(text).get("profile", {})
+        include_all = False
+        include, exclude = [], []
+        for imp in profile.get("imports", []) or []:
+            include_all = include_all or "include-all" in imp
+            include += _with_ids(imp.get("include-controls"))
+            exclude += _with_ids(imp.get("exclude-controls"))
+        title = profile.get("metadata", {}).get("title") or Path(rel).stem
+        return {"name": title, "include_all": include_all, "include": include, "exclude": exclude}
+
+    import yaml
+
+    doc = yaml.safe_load(text) or {}
+    if kind == "mapping":
+        entries = []
+        for m in doc.get("mappings", []) or []:
+            entries.append({
+                "source": str(m.get("source", "")),
+                "controls": [str(c) for c in m.get("controls", []) or []],
+                "tags": [str(t).lower() for t in m.get("tags", []) or []],
+            })
+        framework = Path(rel).stem
+        if framework.endswith("-to-controls"):
+            framework = framework[: -len("-to-controls")]
+        return {"framework": framework, "mappings": entries}
+
+    metadata = doc.get("metadata", {}) or {}
+    return {"name": metadata.get("name") or Path(rel).parent.name,
+            "tags": sorted({str(t).lower() for t in metadata.get("tags", []) or []})}
+
+
+# --- tables ---------------------------------------------------------------------------
+
+def build_tables(fragments: Dict[str, Tuple[str, dict]]) -> dict:
+    """Derive the lookup tables from compiled fragments (no parsing)."""
+    controls: Dict[str, dict] = {}
+    profiles, mappings, packs = [], [], []
+    for rel in sorted(fragments):
+        kind, fragment = fragments[rel]
+        if kind == "catalog":
+            controls.update(fragment["controls"])
+        elif kind == "profile":
+            profiles.append(fragment)
+        elif kind == "mapping":
+            mappings.append(fragment)
+        else:
+            packs.append(fragment)
+
+    # evidence tag -> controls it stands for
+    tag_controls: Dict[str, set] = {}
+    for cid, control in controls.items():
+        tag_controls.setdefault(cid.lower(), set()).add(cid)
+        for tag in control["tags"]:
+            tag_controls.setdefault(tag, set()).add(cid)
+    source_controls: Dict[str, set] = {}
+    for mapping in mappings:
+        for entry in mapping["mappings"]:
+            ids = set(entry["controls"])
+            if entry["source"]:
+                source_controls.setdefault(entry["source"], set()).update(ids)
+                tag_controls.setdefault(entry["source"].lower(), set()).update(ids)
+            for tag in entry["tags"]:
+                tag_controls.setdefault(tag, set()).update(ids)
+
+    pack_controls: Dict[str, List[str]] = {}
+    control_packs: Dict[str, set] = {}
+    for pack in packs:
+        covered = set()
+        for tag in pack["tags"]:
+            covered |= tag_controls.get(tag, set())
+        pack_controls[pack["name"]] = sorted(covered)
+        for cid in covered:
+            control_packs.setdefault(cid, set()).add(pack["name"])
+
+    coverage = {}
+    for profile in profiles:
+        selected = set(controls) if profile["include_all"] else set(profile["include"])
+        selected -= set(profile["exclude"])
+        covered = sorted(c for c in selected if c in control_packs)
+        coverage[profile["name"]] = {
+            "controls": len(selected),
+            "covered": len(covered),
+            "ratio": round(len(covered) / len(selected), 4) if selected else None,
+            "uncovered": sorted(selected - set(covered)),
+        }
+
+    return {
+        "controls": {cid: c["title"] for cid, c in sorted(controls.items())},
+        "control_packs": {cid: sorted(p) for cid, p in sorted(control_packs.items())},
+        "pack_controls": dict(sorted(pack_controls.items())),
+        "source_controls": {s: sorted(c) for s, c in sorted(source_controls.items())},
+        "profiles": coverage,
+    }
+
+
+# --- index ----------------------------------------------------------------------------
+
+class ControlIndex:
+    def __init__(self, data: dict):
+        self.data = data
+        self.tables = data["tables"]
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX) -> "ControlIndex":
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    @classmethod
+    def build(cls, root: Path = ROOT, path: Optional[Path] = DEFAULT_INDEX,
+              include_drafts: bool = False) -> Tuple["ControlIndex", dict]:
+        """
+        Bring the index at `path` up to date, re-parsing only changed sources.
+        Returns the index and {"reparsed": [...], "removed": [...], "sources": n}.
+        """
+        previous = {}
+        if path is not None and Path(path).exists():
+            try:
+                previous = json.loads(Path(path).read_text(encoding="utf-8"))
+            except ValueError:
+                previous = {}
+        if previous.get("version") != INDEX_VERSION or previous.get("include_drafts") != include_drafts:
+            previous = {}
+        old_sources = previous.get("sources", {})
+
+        sources = discover_sources(root, include_drafts)
+        entries = {}
+        reparsed = []
+        for rel, kind in sources.items():
+            data = (root / rel).read_bytes()
+            digest = "sha256:" + hashlib.sha256(data).hexdigest()
+            old = old_sources.get(rel)
+            if old is not None and old["sha256"] == digest and old["kind"] == kind:
+                entries[rel] = old
+                continue
+            entries[rel] = {"kind": kind, "sha256": digest, "fragment": compile_source(kind, data, rel)}
+            reparsed.append(rel)
+        removed = sorted(set(old_sources) - set(sources))
+
+        if reparsed or removed or "tables" not in previous:
+            tables = build_tables({rel: (e["kind"], e["fragment"]) for rel, e in entries.items()})
+        else:
+            tables = previous["tables"]
+        data = {"version": INDEX_VERSION, "include_drafts": include_drafts, "sources": entries, "tables": tables}
+        if path is not None and (reparsed or removed or not previous):
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+        return cls(data), {"reparsed": reparsed, "removed": removed, "sources": len(entries)}
+
+    # --- lookups ---
+
+    def packs_for(self, control_id: str) -> List[str]:
+        return self.tables["control_packs"].get(control_id, [])
+
+    def controls_for(self, pack: str) -> List[str]:
+        return self.tables["pack_controls"].get(pack, [])
+
+    def controls_for_source(self, source_id: str) -> List[str]:
+        return self.tables["source_controls"].get(source_id, [])
+
+    def coverage(self, profile: str) -> Optional[dict]:
+        return self.tables["profiles"].get(profile)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Paygod control coverage index")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX), help="Index file")
+    parser.add_argument("--include-drafts", action="store_true", help="Include packs under packs/_drafts")
+    parser.add_argument("--no-build", action="store_true", help="Query the index as is, without checking sources")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="Build or incrementally update the index")
+    sub.add_parser("packs", help="Packs covering a control").add_argument("control")
+    sub.add_parser("controls", help="Controls covered by a pack").add_argument("pack")
+    sub.add_parser("source", help="Controls mapped from a framework id").add_argument("source_id")
+    sub.add_parser("coverage", help="Profile coverage (all profiles by default)").add_argument("profile", nargs="?")
+    args = parser.parse_args(argv)
+
+    if args.no_build and args.command != "build":
+        index, stats = ControlIndex.load(args.index), None
+    else:
+        index, stats = ControlIndex.build(ROOT, Path(args.index), include_drafts=args.include_drafts)
+
+    if args.command == "build":
+        print(json.dumps({"index": args.index, **stats}, indent=2))
+        return 0
+    if args.command == "packs":
+        result = index.packs_for(args.control)
+    elif args.command == "controls":
+        result = index.controls_for(args.pack)
+    elif args.command == "source":
+        result = index.controls_for_source(args.source_id)
+    elif args.profile:
+        result = index.coverage(args.profile)
+        if result is None:
+            print(json.dumps({"error": f"unknown profile: {args.profile}"}), file=sys.stderr)
+            return 1
+    else:
+        result = index.tables["profiles"]
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
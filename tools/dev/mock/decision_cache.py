@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""\
+WARNING: NOT SOURCE OF TRUTH.
+
+Decision memoization for the DEV/MOCK evaluation path (test_pack.mock_engine_evaluate).
+
+Evaluation is deterministic, so a decision is fully determined by
+(pack digest, input hash). Retried observations hit the cache and skip both
+rule evaluation and canonicalization of the decision.
+
+Both keys are local to this cache and are not receipt fields:
+- the pack digest covers the pack directory name (the mock engine dispatches
+  on it) plus pack.yaml and manifest.json; a receipt's `pack.digest_sha256`
+  is sha256 of pack.yaml alone
+- the input hash is sha256 of sorted-key compact JSON, not the JCS hash a
+  receipt records as `input.canonical_hash`
+
+Tiers:
+- in-memory LRU (bounded by max_entries)
+- optional on-disk tier: <cache_dir>/<pack_digest>/<input_hash>.json
+
+The pack digest is recomputed only when the (size, mtime) of pack.yaml or
+manifest.json change; when it changes, memory entries for the old digest
+are dropped and the disk tier is naturally keyed away from them.
+
+Usage (replay an NDJSON observation stream):
+  python tools/dev/mock/decision_cache.py --pack packs/core/critical-cve-blocker \\
+      --input observations.jsonl [--cache-dir .paygod-cache/decisions]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+import sys
+from typing import Callable, Dict, Optional, Tuple
+
+from test_pack import mock_engine_evaluate
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "tools"))
+
+from simulate_ledger import canonical_json  # noqa: E402
+
+DIGEST_FILES = ("pack.yaml", "manifest.json")
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedDecision:
+    decision: dict
+    canonical: str       # canonical JSON of the decision
+    decision_hash: str   # sha256 hex of `canonical`
+    pack_digest: str
+    input_hash: str
+
+
+class DecisionCache:
+    def __init__(self, max_entries: int = 4096, cache_dir: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: "OrderedDict[Tuple[str, str], CachedDecision]" = OrderedDict()
+        self._pack_digests: Dict[str, Tuple[tuple, str]] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # --- keys -------------------------------------------------------------
+
+    def pack_digest(self, pack_path) -> str:
+        """sha256 over the pack name, pack.yaml and manifest.json, memoized on their (size, mtime)."""
+        pack = Path(pack_path)
+        key = str(pack.resolve())
+        files = [pack / name for name in DIGEST_FILES]
+        stamp = tuple(
+            (st.st_size, st.st_mtime_ns) if (st := _stat(p)) else None for p in files
+        )
+
+        cached = self._pack_digests.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        h = hashlib.sha256()
+        h.update(b"name\0" + pack.name.encode("utf-8") + b"\0")
+        for p in files:
+            if p.exists():
+                h.update(p.name.encode("utf-8") + b"\0")
+                h.update(p.read_bytes())
+                h.update(b"\0")
+        digest = h.hexdigest()
+
+        if cached and cached[1] != digest:
+            self._drop_pack(cached[1])
+        self._pack_digests[key] = (stamp, digest)
+        return digest
+
+    @staticmethod
+    def input_hash(input_data) -> str:
+        return sha256_hex(canonical_json(input_data).encode("utf-8"))
+
+    # --- lookup -----------------------------------------------------------
+
+    def evaluate(
+        self,
+        pack_path,
+        input_data,
+        evaluate_fn: Callable[[str, dict], dict] = mock_engine_evaluate,
+    ) -> CachedDecision:
+        pack_digest = self.pack_digest(pack_path)
+        input_hash = self.input_hash(input_data)
+        key = (pack_digest, input_hash)
+
+        hit = self._entries.get(key)
+        if hit is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return hit
+
+        hit = self._disk_get(key)
+        if hit is not None:
+            self.disk_hits += 1
+            self._put(key, hit)
+            return hit
+
+        self.misses += 1
+        decision = evaluate_fn(str(pack_path), input_data)
+        canonical = canonical_json(decision)
+        result = CachedDecision(
+            decision=decision,
+            canonical=canonical,
+            decision_hash=sha256_hex(canonical.encode("utf-8")),
+            pack_digest=pack_digest,
+            input_hash=input_hash,
+        )
+        self._put(key, result)
+        self._disk_put(key, result)
+        return result
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "lookups": lookups,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 6) if lookups else 0.0,
+        }
+
+    # --- internals --------------------------------------------------------
+
+    def _put(self, key, value: CachedDecision) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _drop_pack(self, pack_digest: str) -> None:
+        stale = [k for k in self._entries if k[0] == pack_digest]
+        for k in stale:
+            del self._entries[k]
+        self.invalidations += len(stale)
+
+    def _disk_path(self, key) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        pack_digest, input_hash = key
+        return self.cache_dir / pack_digest / f"{input_hash}.json"
+
+    def _disk_get(self, key) -> Optional[CachedDecision]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            canonical = path.read_text(encoding="utf-8")
+            decision = json.loads(canonical)
+        except (OSError, ValueError):  # unreadable or corrupt: treat as a miss and rewrite
+            return None
+        return CachedDecision(
+            decision=decision,
+            canonical=canonical,
+            decision_hash=sha256_hex(canonical.encode("utf-8")),
+            pack_digest=key[0],
+            input_hash=key[1],
+        )
+
+    def _disk_put(self, key, value: CachedDecision) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(value.canonical, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def _stat(path: Path):
+    try:
+        return path.stat()
+    except OSError:
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay observations through the cached mock engine")
+    parser.add_argument("--pack", required=True, help="Path to the pack directory")
+    parser.add_argument("--input", required=True, help="NDJSON file with one input document per line")
+    parser.add_argument("--cache-dir", help="Enable the on-disk tier at this directory")
+    parser.add_argument("--max-entries", type=int, default=4096, help="In-memory LRU size")
+    args = parser.parse_args()
+
+    cache = DecisionCache(max_entries=args.max_entries, cache_dir=args.cache_dir)
+    with open(args.input, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                cache.evaluate(args.pack, json.loads(line))
+
+    print(json.dumps(cache.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""\
+WARNING: NOT SOURCE OF TRUTH.
+
+Synthetic load generator and end-to-end throughput harness for the DEV/MOCK
+decision pipeline:
+
+  observation -> test_pack.mock_engine_evaluate -> simulate_ledger.Ledger.append -> receipt
+
+Receipts record `input.canonical_hash` as sha256 of the JCS (RFC 8785)
+canonical form, so every decision pays for one JCS canonicalization even on a
+decision-cache hit.
+
+Inputs are generated from each pack's `spec.inputs[].schema` (a small JSON
+Schema subset: object/array/string/number/integer/boolean). Array lengths and
+extra payload depth are configurable so that e.g. vulnerability counts can be
+skewed. Each worker process owns one ledger (a single hash chain cannot be
+appended concurrently). Inputs are generated before the clock starts.
+
+Modes:
+- flat-out (default): every worker runs as fast as it can
+- --rate R: total target rate in decisions/sec, split across workers; latency
+  is measured from the scheduled start so queueing delay is not hidden
+
+Usage:
+  python tools/dev/mock/load_harness.py --workers 4 --duration 10 \\
+      --array-size 0:50 --depth 3 --out bench.json [--compare baseline.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import jcs
+
+from decision_cache import DecisionCache
+from test_pack import load_yaml, mock_engine_evaluate
+
+ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(ROOT / "tools"))
+
+from simulate_ledger import Ledger, canonical_json  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PACK_ROOTS = ("packs/core", "packs/providers")
+
+# Realistic values for well-known property names; anything else is random.
+KNOWN_VALUES = {
+    "severity": ["LOW", "MEDIUM", "HIGH", "CRITICAL"],
+    "status": ["active", "fixed", "ignored"],
+    "policy_attached": ["AdministratorAccess", "ReadOnlyAccess", "PowerUserAccess"],
+    "event_name": ["AttachUserPolicy", "AttachRolePolicy", "PutUserPolicy"],
+    "source_region": ["eu-west-1", "us-east-1", "me-central-1"],
+    "target_region": ["eu-west-1", "us-east-1", "me-central-1"],
+    "approved_by_role": ["CISO", "CTO", "DPO"],
+}
+
+
+# --- synthetic input generation -------------------------------------------
+
+class InputGenerator:
+    def __init__(self, rng: random.Random, array_size: Tuple[int, int],
+                 field_sizes: Dict[str, Tuple[int, int]], depth: int):
+        self.rng = rng
+        self.array_size = array_size
+        self.field_sizes = field_sizes
+        self.depth = depth
+
+    def for_pack(self, pack_doc: dict) -> dict:
+        doc = {}
+        for spec_input in (pack_doc.get("spec") or {}).get("inputs") or []:
+            doc[spec_input["name"]] = self.value(spec_input.get("schema") or {}, spec_input["name"])
+        if self.depth:
+            doc["_synthetic"] = self.nested(self.depth)
+        return doc
+
+    def value(self, schema: dict, name: str):
+        rng = self.rng
+        kind = schema.get("type", "string")
+        if kind == "object":
+            return {k: self.value(v or {}, k) for k, v in (schema.get("properties") or {}).items()}
+        if kind == "array":
+            lo, hi = self.field_sizes.get(name, self.array_size)
+            return [self.value(schema.get("items") or {}, name) for _ in range(rng.randint(lo, hi))]
+        if name in KNOWN_VALUES:
+            return rng.choice(KNOWN_VALUES[name])
+        if kind == "number":
+            return round(rng.uniform(0.0, 10.0), 1)
+        if kind == "integer":
+            return rng.choice([0, 0, 0, rng.randint(1, 20)])
+        if kind == "boolean":
+            return rng.random() < 0.5
+        if name.endswith("_id"):
+            return f"{name[:-3].upper()}-{rng.randint(1000, 99999)}"
+        if rng.random() < 0.1:
+            return None
+        return f"{name}-{rng.getrandbits(32):08x}"
+
+    def nested(self, depth: int):
+        if depth == 0:
+            return self.rng.getrandbits(16)
+        return {f"k{i}": self.nested(depth - 1) for i in range(2)}
+
+
+def discover_packs(repo: Path) -> List[Path]:
+    packs = []
+    for rel in PACK_ROOTS:
+        for pack_yaml in sorted((repo / rel).rglob("pack.yaml")):
+            doc = load_yaml(pack_yaml) or {}
+            if (doc.get("spec") or {}).get("inputs"):
+                packs.append(pack_yaml.parent)
+    return packs
+
+
+def _parse_range(text: str) -> Tuple[int, int]:
+    lo, _, hi = text.partition(":")
+    return int(lo), int(hi or lo)
+
+
+# --- pipeline ---------------------------------------------------------------
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def build_receipt(pack: Path, pack_digest: str, observation: dict, decision: dict, entry: dict) -> dict:
+    # input.canonical_hash is sha256 of the JCS (RFC 8785) form, as verify_spec
+    # computes it; the decision cache's input_hash is a cheaper sorted-key key.
+    return {
+        "pack": {"path": str(pack), "digest_sha256": pack_digest},
+        "input": {"canonical_hash": hashlib.sha256(jcs.canonicalize(observation)).hexdigest()},
+        "verdict": {"value": decision["decision"], "reason": decision.get("reason")},
+        "ledger": {"entry_index": entry["entry_index"], "record_hash": entry["record_hash"]},
+    }
+
+
+def _worker(task: dict) -> dict:
+    rng = random.Random(task["seed"])
+    gen = InputGenerator(rng, tuple(task["array_size"]), {k: tuple(v) for k, v in task["field_sizes"].items()},
+                         task["depth"])
+    packs = [Path(p) for p in task["packs"]]
+    pack_docs = [load_yaml(p / "pack.yaml") for p in packs]
+    # A receipt's pack.digest_sha256 is sha256 of pack.yaml, as the CLI records it.
+    digests = {p: hashlib.sha256((p / "pack.yaml").read_bytes()).hexdigest() for p in packs}
+    cache = DecisionCache(max_entries=task["cache_entries"]) if task["cache_entries"] else None
+
+    corpus: List[Tuple[Path, dict]] = []
+    for i in range(task["corpus"]):
+        if corpus and rng.random() < task["duplicate_ratio"]:
+            corpus.append(rng.choice(corpus))
+            continue
+        j = i % len(packs)
+        corpus.append((packs[j], gen.for_pack(pack_docs[j])))
+
+    if task["trace_memory"]:
+        tracemalloc.start()
+    ledger = Ledger()
+    latencies: List[float] = []
+    interval = 1.0 / task["rate"] if task["rate"] else 0.0
+    start = time.perf_counter()
+    deadline = start + task["duration"]
+    n = 0
+    while True:
+        scheduled = start + n * interval if interval else time.perf_counter()
+        if scheduled >= deadline or (task["count"] and n >= task["count"]):
+            break
+        now = time.perf_counter()
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+        pack, observation = corpus[n % len(corpus)]
+        if cache is not None:
+            cached = cache.evaluate(pack, observation)
+            decision, decision_hash, input_hash = cached.decision, cached.decision_hash, cached.input_hash
+        else:
+            input_hash = _sha256(canonical_json(observation))
+            decision = mock_engine_evaluate(str(pack), observation)
+            decision_hash = _sha256(canonical_json(decision))
+        entry = ledger.append("decision", {"decision": decision["decision"], "input_hash": input_hash,
+                                           "decision_hash": decision_hash})
+        receipt = build_receipt(pack, digests[pack], observation, decision, entry)
+        canonical_json(receipt)
+
+        latencies.append(time.perf_counter() - scheduled)
+        n += 1
+    elapsed = time.perf_counter() - start
+
+    peak_traced = tracemalloc.get_traced_memory()[1] if task["trace_memory"] else None
+    if task["trace_memory"]:
+        tracemalloc.stop()
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    return {
+        "decisions": n,
+        "elapsed_s": elapsed,
+        "latencies": latencies,
+        "max_rss_kb": max_rss_kb,
+        "peak_traced_bytes": peak_traced,
+        "ledger_entries": len(ledger.chain),
+        "cache": cache.stats() if cache is not None else None,
+    }
+
+
+# --- reporting --------------------------------------------------------------
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest rank: the smallest value with at least pct% of samples at or below it.
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(config: dict, results: List[dict]) -> dict:
+    # Workers run concurrently; pool startup and corpus generation are excluded.
+    wall_s = max((r["elapsed_s"] for r in results), default=0.0)
+    latencies = sorted(l for r in results for l in r["latencies"])
+    decisions = sum(r["decisions"] for r in results)
+    ms = lambda s: round(s * 1000.0, 4)
+    return {
+        "commit": _git_commit(),
+        "config": config,
+        "decisions": decisions,
+        "wall_s": round(wall_s, 4),
+        "throughput_per_s": round(decisions / wall_s, 2) if wall_s else 0.0,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if latencies else 0.0,
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        },
+        "memory": {
+            "max_rss_kb_per_worker": max((r["max_rss_kb"] or 0) for r in results) or None,
+            "peak_traced_bytes_per_worker": max((r["peak_traced_bytes"] or 0) for r in results) or None,
+        },
+        "workers": [
+            {k: v for k, v in r.items() if k != "latencies"} for r in results
+        ],
+    }
+
+
+def compare(report: dict, baseline: dict) -> None:
+    def delta(new, old):
+        return f"{new} (baseline {old}, {((new - old) / old * 100.0) if old else 0.0:+.1f}%)"
+
+    print(f"Comparison vs {baseline.get('commit') or 'baseline'}:")
+    print(f"  throughput/s: {delta(report['throughput_per_s'], baseline['throughput_per_s'])}")
+    for p in ("p50", "p95", "p99"):
+        print(f"  {p} ms: {delta(report['latency_ms'][p], baseline['latency_ms'][p])}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paygod decision pipeline load harness (mock)")
+    parser.add_argument("--pack", action="append", default=[], help="Pack directory (repeatable; default: all with spec.inputs)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run per worker")
+    parser.add_argument("--count", type=int, default=0, help="Stop each worker after N decisions (0 = duration only)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Total target decisions/sec (0 = flat-out)")
+    parser.add_argument("--corpus", type=int, default=1000, help="Distinct generated inputs per worker")
+    parser.add_argument("--array-size", default="0:10", help="Default array length range MIN:MAX")
+    parser.add_argument("--field-size", action="append", default=[], help="Per-field array range, e.g. vulnerabilities=0:200")
+    parser.add_argument("--depth", type=int, default=0, help="Extra nested payload depth per input")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0, help="Fraction of corpus entries that repeat earlier ones")
+    parser.add_argument("--cache-entries", type=int, default=0, help="Route evaluation through DecisionCache of this size")
+    parser.add_argument("--trace-memory", action="store_true", help="Record tracemalloc peak per worker (slower)")
+    parser.add_argument("--seed", type=int, default=1, help="RNG seed")
+    parser.add_argument("--out", help="Write JSON report to this path")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    packs = [Path(p).resolve() for p in args.pack] or discover_packs(ROOT)
+    if not packs:
+        print("❌ No packs with spec.inputs found.")
+        return 2
+
+    field_sizes = {}
+    for item in args.field_size:
+        name, _, rng = item.partition("=")
+        field_sizes[name] = _parse_range(rng)
+
+    config = {
+        "packs": [str(p.relative_to(ROOT)).replace("\\", "/") if p.is_relative_to(ROOT) else str(p) for p in packs],
+        "workers": args.workers,
+        "duration_s": args.duration,
+        "count": args.count,
+        "rate": args.rate,
+        "corpus": args.corpus,
+        "array_size": list(_parse_range(args.array_size)),
+        "field_sizes": {k: list(v) for k, v in field_sizes.items()},
+        "depth": args.depth,
+        "duplicate_ratio": args.duplicate_ratio,
+        "cache_entries": args.cache_entries,
+        "seed": args.seed,
+    }
+    tasks = [
+        {
+            **config,
+            "packs": [str(p) for p in packs],
+            "rate": args.rate / args.workers,
+            "duration": args.duration,
+            "trace_memory": args.trace_memory,
+            "seed": args.seed + i,
+        }
+        for i in range(args.workers)
+    ]
+
+    with Pool(args.workers) as pool:
+        results = pool.map(_worker, tasks)
+    report = build_report(config, results)
+
+    lat = report["latency_ms"]
+    print(f"decisions={report['decisions']} throughput={report['throughput_per_s']}/s "
+          f"p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms "
+          f"max_rss={report['memory']['max_rss_kb_per_worker']}KB")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""\
+WARNING: NOT SOURCE OF TRUTH.
+
+Parallel DEV/MOCK pack test runner built on test_pack.mock_engine_evaluate.
+Do not use it for pack results, CI gating, or compliance decisions.
+Use the PayGod CLI instead: `dotnet run --project src/PayGod.Cli -- test --pack ...`
+
+Discovers every pack with tests/cases.yaml under packs/core and packs/providers
+(and packs/_drafts with --include-drafts), runs all cases concurrently across a
+process pool and reports per-case wall time.
+
+Usage:
+  python tools/dev/mock/run_pack_tests.py [--include-drafts] [--workers N]
+      [--json results.json] [--junit results.xml] [--slowest 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from test_pack import compile_matcher, load_yaml, mock_engine_evaluate
+
+ROOT = Path(__file__).resolve().parents[3]
+PACK_ROOTS = ("packs/core", "packs/providers")
+DRAFTS_ROOT = "packs/_drafts"
+
+
+def discover_packs(repo: Path, include_drafts: bool) -> List[Path]:
+    roots = list(PACK_ROOTS) + ([DRAFTS_ROOT] if include_drafts else [])
+    packs = []
+    for rel in roots:
+        base = repo / rel
+        if not base.exists():
+            continue
+        for cases in base.rglob("tests/cases.yaml"):
+            packs.append(cases.parent.parent)
+    return sorted(packs)
+
+
+@lru_cache(maxsize=None)
+def _load_cases(pack_path: str) -> Tuple[dict, ...]:
+    """Load and precompile a pack's cases once per worker process."""
+    suite = load_yaml(Path(pack_path) / "tests" / "cases.yaml") or {}
+    compiled = []
+    for case in suite.get("cases", []):
+        expected = case.get("expected", {})
+        compiled.append({
+            "name": case["name"],
+            "input": case["input"],
+            "decision": expected.get("decision"),
+            "matchers": [(m, compile_matcher(m)) for m in expected.get("matchers", [])],
+        })
+    return tuple(compiled)
+
+
+def _run_case(pack_path: str, index: int) -> dict:
+    case = _load_cases(pack_path)[index]
+    result = {"pack": pack_path, "case": case["name"], "status": "passed", "message": None}
+
+    start = time.perf_counter()
+    try:
+        actual = mock_engine_evaluate(pack_path, case["input"])
+        if actual["decision"] != case["decision"]:
+            result["status"] = "failed"
+            result["message"] = (
+                f"expected decision {case['decision']!r}, got {actual['decision']!r} "
+                f"(reason: {actual.get('reason')})"
+            )
+        else:
+            for raw, predicate in case["matchers"]:
+                if not predicate(actual):
+                    result["status"] = "failed"
+                    result["message"] = f"matcher failed: {raw}; actual output: {actual}"
+                    break
+    except Exception as e:
+        result["status"] = "error"
+        result["message"] = f"{type(e).__name__}: {e}"
+    result["wall_ms"] = round((time.perf_counter() - start) * 1000.0, 3)
+    return result
+
+
+def _pack_jobs(packs: List[Path]) -> Tuple[List[Tuple[str, int]], List[dict]]:
+    jobs: List[Tuple[str, int]] = []
+    load_errors: List[dict] = []
+    for pack in packs:
+        try:
+            count = len(_load_cases(str(pack)))
+        except Exception as e:
+            load_errors.append({
+                "pack": str(pack), "case": "<load>", "status": "error",
+                "message": f"Failed to load test cases: {e}", "wall_ms": 0.0,
+            })
+            continue
+        jobs.extend((str(pack), i) for i in range(count))
+    return jobs, load_errors
+
+
+def run_all(packs: List[Path], workers: Optional[int]) -> List[dict]:
+    jobs, results = _pack_jobs(packs)
+    if not jobs:
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_case, pack, i) for pack, i in jobs]
+        results.extend(f.result() for f in futures)
+    return results
+
+
+def _rel(path: str) -> str:
+    try:
+        return str(Path(path).relative_to(ROOT)).replace("\\", "/")
+    except ValueError:
+        return path
+
+
+def build_report(results: List[dict], wall_s: float, slowest: int) -> dict:
+    for r in results:
+        r["pack"] = _rel(r["pack"])
+    counts: Dict[str, int] = {"passed": 0, "failed": 0, "error": 0}
+    for r in results:
+        counts[r["status"]] += 1
+    per_pack: Dict[str, float] = {}
+    for r in results:
+        per_pack[r["pack"]] = per_pack.get(r["pack"], 0.0) + r["wall_ms"]
+    return {
+        "ok": counts["failed"] == 0 and counts["error"] == 0,
+        "total": len(results),
+        **counts,
+        "wall_ms": round(wall_s * 1000.0, 3),
+        "packs": {k: round(v, 3) for k, v in sorted(per_pack.items())},
+        "slowest": sorted(results, key=lambda r: r["wall_ms"], reverse=True)[:slowest],
+        "cases": results,
+    }
+
+
+def write_junit(report: dict, path: Path) -> None:
+    suites = ET.Element("testsuites", tests=str(report["total"]),
+                        failures=str(report["failed"]), errors=str(report["error"]),
+                        time=f"{report['wall_ms'] / 1000.0:.6f}")
+    by_pack: Dict[str, List[dict]] = {}
+    for r in report["cases"]:
+        by_pack.setdefault(r["pack"], []).append(r)
+    for pack, cases in by_pack.items():
+        suite = ET.SubElement(
+            suites, "testsuite", name=pack, tests=str(len(cases)),
+            failures=str(sum(c["status"] == "failed" for c in cases)),
+            errors=str(sum(c["status"] == "error" for c in cases)),
+            time=f"{report['packs'][pack] / 1000.0:.6f}",
+        )
+        for c in cases:
+            tc = ET.SubElement(suite, "testcase", classname=pack, name=c["case"],
+                               time=f"{c['wall_ms'] / 1000.0:.6f}")
+            if c["status"] == "failed":
+                ET.SubElement(tc, "failure", message=c["message"] or "")
+            elif c["status"] == "error":
+                ET.SubElement(tc, "error", message=c["message"] or "")
+    ET.ElementTree(suites).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paygod Parallel Pack Test Runner (mock)")
+    parser.add_argument("packs", nargs="*", help="Pack directories (default: discover under packs/)")
+    parser.add_argument("--include-drafts", action="store_true", help="Also run packs/_drafts")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--json", dest="json_out", help="Write JSON results to this path")
+    parser.add_argument("--junit", dest="junit_out", help="Write JUnit XML results to this path")
+    parser.add_argument("--slowest", type=int, default=10, help="Number of slowest cases to report")
+    args = parser.parse_args()
+
+    packs = [Path(p).resolve() for p in args.packs] or discover_packs(ROOT, args.include_drafts)
+    if not packs:
+        print("❌ No packs with tests/cases.yaml found.")
+        return 2
+
+    start = time.perf_counter()
+    results = run_all(packs, args.workers)
+    report = build_report(results, time.perf_counter() - start, args.slowest)
+
+    for r in report["cases"]:
+        if r["status"] != "passed":
+            print(f"❌ {r['pack']} :: {r['case']} ({r['status']})")
+            print(f"    {r['message']}")
+    print(f"{'✅' if report['ok'] else '❌'} {report['passed']}/{report['total']} cases passed "
+          f"across {len(report['packs'])} packs in {report['wall_ms']:.1f} ms")
+    if report["slowest"]:
+        print("Slowest cases:")
+        for r in report["slowest"]:
+            print(f"  {r['wall_ms']:9.3f} ms  {r['pack']} :: {r['case']}")
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    if args.junit_out:
+        write_junit(report, Path(args.junit_out))
+
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
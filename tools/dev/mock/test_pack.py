@@ -105,26 +105,46 @@ def mock_engine_evaluate(pack_path, input_data):
     # Default fallback for unknown packs
     return {"decision": "flag", "reason": f"Unknown pack logic for {pack_name}"}
 
-def assert_match(actual, matcher):
-    field = matcher['field']
+def resolve_field(actual, path):
+    """Walk a dotted field path (e.g. "payload.risk_score", "items.0.id")."""
+    value = actual
+    for part in path:
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+    return value
+
+def compile_matcher(matcher):
+    """
+    Compile a matcher once into a predicate over the engine output.
+    The field path is split and regex patterns are compiled up front so
+    repeated evaluation does no parsing work.
+    """
+    path = tuple(matcher['field'].split('.'))
     operator = matcher['operator']
     expected_value = matcher['value']
-    
-    # Simple field extraction (nested support could be added)
-    actual_value = actual.get(field)
-    
+
     if operator == 'equals':
-        return actual_value == expected_value
+        check = lambda v: v == expected_value
     elif operator == 'contains':
-        return expected_value in str(actual_value)
+        check = lambda v: expected_value in str(v)
     elif operator == 'gt':
-        return actual_value > expected_value
+        check = lambda v: v > expected_value
     elif operator == 'lt':
-        return actual_value < expected_value
+        check = lambda v: v < expected_value
     elif operator == 'regex':
-        return re.search(expected_value, str(actual_value)) is not None
-    
-    return False
+        pattern = re.compile(expected_value)
+        check = lambda v: pattern.search(str(v)) is not None
+    else:
+        check = lambda v: False
+
+    return lambda actual: check(resolve_field(actual, path))
+
+def assert_match(actual, matcher):
+    return compile_matcher(matcher)(actual)
 
 def run_tests(pack_path):
     cases_path = Path(pack_path) / "tests" / "cases.yaml"
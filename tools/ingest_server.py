@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+asyncio ingestion service: newline-delimited observations -> ledger appends.
+
+Each connection sends one observation JSON object per line. Lines are validated
+against contracts/schemas/observation.schema.json and queued on a bounded
+asyncio.Queue. A single writer task drains the queue in batches and appends
+them to the ledger in a worker thread. Each line gets exactly one
+acknowledgement line, in request order:
+
+  {"ok": true, "entry_index": 42, "record_hash": "sha256:..."}
+  {"ok": false, "error": "...", "path": [...]}
+
+Lines longer than --line-limit bytes are skipped and acknowledged with
+{"ok": false, "error": "line too long"}; the connection stays open.
+
+Backpressure: when the queue is full, readers stop consuming their sockets, so
+slow ledger writes throttle collectors instead of growing memory. Pipelined
+requests per connection are capped by --max-inflight.
+
+Ledger: --ledger ledger.jsonl uses ledger_index.IndexedLedger (indexes kept current);
+without it an in-memory simulate_ledger.Ledger is used.
+
+Usage:
+  python tools/ingest_server.py serve --ledger ledger.jsonl [--socket /tmp/paygod-ingest.sock | --port 8765]
+  python tools/ingest_server.py client observations.jsonl [--socket ... | --port 8765]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+SCHEMA_PATH = ROOT / "contracts" / "schemas" / "observation.schema.json"
+DEFAULT_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class IngestServer:
+    def __init__(self, ledger, queue_size: int = 10000, batch_size: int = 512, max_inflight: int = 1024,
+                 line_limit: int = DEFAULT_LINE_LIMIT):
+        from jsonschema import Draft202012Validator
+
+        from validate import checker
+
+        self.ledger = ledger
+        self.validator = Draft202012Validator(
+            json.loads(SCHEMA_PATH.read_text(encoding="utf-8")), format_checker=checker
+        )
+        self.queue: "asyncio.Queue[Tuple[dict, asyncio.Future]]" = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.max_inflight = max_inflight
+        self.line_limit = line_limit
+        self.accepted = 0
+        self.rejected = 0
+
+    # --- writer -----------------------------------------------------------------
+
+    def _append_batch(self, batch: List[dict]) -> List[dict]:
+        """
+        Append in order. An append failure fails that observation and the rest
+        of the batch (they were not appended); earlier ones keep their entries.
+        """
+        results = []
+        for obs in batch:
+            try:
+                entry = self.ledger.append("observation", obs)
+            except Exception as e:
+                failed = {"ok": False, "error": f"ledger append failed: {e}"}
+                results += [failed] * (len(batch) - len(results))
+                break
+            results.append({"ok": True, "entry_index": entry["entry_index"], "record_hash": entry["record_hash"]})
+        flush = getattr(self.ledger, "flush", None)
+        if flush is not None:
+            try:
+                flush()
+            except Exception as e:  # appended, but not known to be durable: keep the entry_index
+                results = [dict(r, ok=False, error=f"ledger flush failed: {e}") if r["ok"] else r
+                           for r in results]
+        return results
+
+    async def writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.queue.get()
+            batch = [item]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(None, self._append_batch, [obs for obs, _ in batch])
+            except Exception as e:  # executor failure: nothing is known to be appended
+                results = [{"ok": False, "error": f"ledger append failed: {e}"}] * len(batch)
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+            for _ in batch:
+                self.queue.task_done()
+
+    # --- connections --------------------------------------------------------------
+
+    def _check(self, line: bytes):
+        try:
+            obs = json.loads(line)
+        except ValueError as e:
+            return None, {"ok": False, "error": f"invalid JSON: {e}"}
+        errors = sorted(self.validator.iter_errors(obs), key=lambda e: list(e.path))
+        if errors:
+            return None, {"ok": False, "error": errors[0].message, "path": list(errors[0].path)}
+        return obs, None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        pending: "asyncio.Queue[Optional[asyncio.Future]]" = asyncio.Queue(maxsize=self.max_inflight)
+
+        async def ack() -> None:
+            try:
+                while True:
+                    fut = await pending.get()
+                    if fut is None:
+                        break
+                    writer.write(json.dumps(await fut).encode("utf-8") + b"\n")
+                    # Returns at once below the high-water mark; a collector that
+                    # does not read its acks stalls here, then pending fills up and
+                    # this connection stops being read.
+                    await writer.drain()
+            except ConnectionError:
+                pass
+
+        acker = asyncio.create_task(ack())
+
+        async def put(fut: Optional[asyncio.Future]) -> None:
+            """Queue an ack; raises ConnectionResetError once the acker has stopped."""
+            if not pending.full():
+                pending.put_nowait(fut)
+                return
+            putter = asyncio.ensure_future(pending.put(fut))
+            await asyncio.wait((putter, acker), return_when=asyncio.FIRST_COMPLETED)
+            if not putter.done():
+                putter.cancel()
+                raise ConnectionResetError("collector stopped reading acknowledgements")
+
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial  # last line without a newline, or EOF
+                except asyncio.LimitOverrunError as e:
+                    # Longer than the stream limit: discard it and acknowledge it.
+                    await reader.readexactly(e.consumed)
+                    if not await _skip_line(reader):
+                        break
+                    self.rejected += 1
+                    fut = loop.create_future()
+                    fut.set_result({"ok": False, "error": "line too long"})
+                    await put(fut)
+                    continue
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                fut = loop.create_future()
+                obs, error = self._check(line)
+                if error is not None:
+                    self.rejected += 1
+                    fut.set_result(error)
+                    await put(fut)
+                    continue
+                self.accepted += 1
+                await put(fut)  # bounds pipelined requests per connection
+                await self.queue.put((obs, fut))  # bounds total queued work (backpressure)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:  # server shutdown: do not wait for a stalled collector
+            acker.cancel()
+            writer.close()
+            raise
+        try:
+            await put(None)
+            await acker
+            await writer.drain()
+        except ConnectionError:
+            acker.cancel()
+        writer.close()
+
+
+async def _skip_line(reader: asyncio.StreamReader) -> bool:
+    """Discard input up to and including the next newline; False at EOF."""
+    # After a LimitOverrunError, consuming `consumed` bytes either reaches the
+    # separator (then readuntil returns at once) or frees the buffer for more.
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return True
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+        except asyncio.IncompleteReadError:
+            return False
+
+
+async def serve(args) -> int:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    if args.ledger:
+        from ledger_index import IndexedLedger
+
+        ledger = IndexedLedger(args.ledger)
+    else:
+        from simulate_ledger import Ledger
+
+        ledger = Ledger()
+
+    server = IngestServer(ledger, queue_size=args.queue_size, batch_size=args.batch_size,
+                          max_inflight=args.max_inflight, line_limit=args.line_limit)
+    writer_task = asyncio.create_task(server.writer())
+    if args.socket:
+        if Path(args.socket).exists():
+            Path(args.socket).unlink()
+        srv = await asyncio.start_unix_server(server.handle, path=args.socket, limit=args.line_limit)
+        where = args.socket
+    else:
+        srv = await asyncio.start_server(server.handle, host=args.host, port=args.port, limit=args.line_limit)
+        where = f"{args.host}:{args.port}"
+    print(f"paygod ingest listening on {where}", file=sys.stderr)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    async with srv:
+        await stop.wait()
+        srv.close()
+        await srv.wait_closed()
+    if args.socket and Path(args.socket).exists():
+        Path(args.socket).unlink()
+    await server.queue.join()
+    writer_task.cancel()
+    if hasattr(ledger, "close"):
+        ledger.close()
+    print(json.dumps({"accepted": server.accepted, "rejected": server.rejected}), file=sys.stderr)
+    return 0
+
+
+async def client(args) -> int:
+    """Stand-in collector: pipeline an NDJSON file and report acknowledgements."""
+    if args.socket:
+        reader, writer = await asyncio.open_unix_connection(args.socket, limit=DEFAULT_LINE_LIMIT)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port, limit=DEFAULT_LINE_LIMIT)
+
+    source = open(args.input, "rb") if args.input != "-" else sys.stdin.buffer
+    lines = [line for line in source if line.strip()]
+    start = time.perf_counter()
+
+    async def send() -> None:
+        for line in lines:
+            writer.write(line if line.endswith(b"\n") else line + b"\n")
+            await writer.drain()
+        if writer.can_write_eof():
+            writer.write_eof()
+
+    sender = asyncio.create_task(send())
+    ok = failed = 0
+    for _ in lines:
+        try:
+            raw = await reader.readline()
+        except ConnectionError:
+            raw = b""
+        if not raw:
+            break  # server closed the connection; the rest are reported as missing
+        ack = json.loads(raw)
+        if ack.get("ok"):
+            ok += 1
+        else:
+            failed += 1
+            if args.verbose:
+                print(json.dumps(ack), file=sys.stderr)
+    missing = len(lines) - ok - failed
+    if missing:
+        sender.cancel()
+        print(f"connection closed with {missing} acknowledgements missing", file=sys.stderr)
+    try:
+        await sender
+    except (asyncio.CancelledError, ConnectionError):
+        pass
+    elapsed = time.perf_counter() - start
+    writer.close()
+    print(json.dumps({"sent": len(lines), "ok": ok, "failed": failed, "missing": missing,
+                      "seconds": round(elapsed, 4),
+                      "per_s": round(len(lines) / elapsed, 1) if elapsed else None}))
+    return 0 if failed == 0 and missing == 0 else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paygod observation ingestion service")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("serve", "client"):
+        p = sub.add_parser(name)
+        p.add_argument("--socket", help="Unix socket path (default: TCP)")
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=8765)
+        if name == "serve":
+            p.add_argument("--ledger", help="ledger.jsonl path (default: in-memory ledger)")
+            p.add_argument("--queue-size", type=int, default=10000, help="Bounded queue size (backpressure)")
+            p.add_argument("--batch-size", type=int, default=512, help="Max observations per ledger batch")
+            p.add_argument("--max-inflight", type=int, default=1024, help="Max unacknowledged lines per connection")
+            p.add_argument("--line-limit", type=int, default=DEFAULT_LINE_LIMIT, help="Max bytes per line")
+        else:
+            p.add_argument("input", help="NDJSON observations file, or - for stdin")
+            p.add_argument("--verbose", action="store_true", help="Print rejected acknowledgements")
+    args = parser.parse_args()
+    return asyncio.run(serve(args) if args.command == "serve" else client(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Hot-path instrumentation for the Python tooling.
+
+Disabled by default; when disabled, `stage()` returns a shared no-op context
+and `timed()` wrappers cost one attribute check per call.
+
+Enable with environment variables (read at import) or `enable()`:
+- PAYGOD_METRICS=1                 stage timers, counters and latency histograms
+- PAYGOD_METRICS_OUT=<path>        write a snapshot at exit (.prom => Prometheus text, else JSON)
+- PAYGOD_PROFILE=<stage,...|*>     cProfile the listed stages; stats go to PAYGOD_PROFILE_DIR (default .paygod-profile/)
+- PAYGOD_TRACEMALLOC=<stage,...|*> record peak traced allocation per call of the listed stages, measured
+                                   above the traced total on entry (nested stages do not disturb it)
+
+Instrumented stages:
+  canonicalize   simulate_ledger.canonical_json, calculate_vectors.jcs_compliant_dump (top level)
+  hash           simulate_ledger.sha256, calculate_vectors.calculate_hash
+  schema_validate  validate.py, pack_validate.py
+  ledger_append / ledger_verify  simulate_ledger.Ledger
+
+Exports:
+- snapshot() / to_json(): plain dict
+- to_prometheus(): text exposition format (paygod_stage_duration_seconds histogram,
+  paygod_stage_calls_total, paygod_stage_peak_alloc_bytes and one paygod_<name>_total
+  per count() name, e.g. paygod_bytes_total, paygod_records_total), the format a
+  Prometheus-style scraper (e.g. src/Paygod.Metrics.Service) can consume
+- serve(port): background HTTP endpoint exposing /metrics (Prometheus) and /metrics.json
+
+Usage:
+  PAYGOD_METRICS=1 PAYGOD_METRICS_OUT=metrics.prom python tools/simulate_ledger.py
+  python tools/instrument.py metrics.json          # re-render a JSON snapshot as Prometheus text
+"""
+
+from __future__ import annotations
+
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Upper bounds in seconds (Prometheus "le" buckets); +Inf is implicit.
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+
+
+class _State:
+    enabled = False
+    profile: frozenset = frozenset()
+    tracemalloc: frozenset = frozenset()
+    profile_dir = Path(".paygod-profile")
+
+
+_state = _State()
+_lock = threading.Lock()
+_stages: Dict[str, "_StageStats"] = {}
+_counters: Dict[tuple, float] = {}
+_profilers: Dict[str, object] = {}
+_traced = threading.local()  # stack of open traced stages per thread
+
+
+class _StageStats:
+    __slots__ = ("calls", "total", "max", "buckets", "peak_alloc")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.peak_alloc = 0
+
+    def observe(self, seconds: float) -> None:
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ("name", "start", "profiler", "traced", "base", "high")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profiler = None
+        self.traced = False
+
+    def __enter__(self):
+        name = self.name
+        if name in _state.profile or "*" in _state.profile:
+            self.profiler = _profiler_for(name)
+            try:
+                self.profiler.enable()
+            except ValueError:  # another profiler is active (nested stage)
+                self.profiler = None
+        if name in _state.tracemalloc or "*" in _state.tracemalloc:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # reset_peak() is global: fold the peak so far into the enclosing
+            # traced stages before resetting it for this one.
+            current, peak = tracemalloc.get_traced_memory()
+            stack = _traced.__dict__.setdefault("stack", [])
+            for outer in stack:
+                if peak > outer.high:
+                    outer.high = peak
+            tracemalloc.reset_peak()
+            self.base = self.high = current
+            stack.append(self)
+            self.traced = True
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        if self.profiler is not None:
+            self.profiler.disable()
+        peak = 0
+        if self.traced:
+            import tracemalloc
+
+            self.high = max(self.high, tracemalloc.get_traced_memory()[1])
+            stack = _traced.stack
+            stack.remove(self)
+            for outer in stack:
+                if self.high > outer.high:
+                    outer.high = self.high
+            peak = self.high - self.base
+        with _lock:
+            stats = _stages.get(self.name)
+            if stats is None:
+                stats = _stages[self.name] = _StageStats()
+            stats.observe(elapsed)
+            if peak > stats.peak_alloc:
+                stats.peak_alloc = peak
+        return False
+
+
+def _profiler_for(name: str):
+    prof = _profilers.get(name)
+    if prof is None:
+        import cProfile
+
+        prof = _profilers[name] = cProfile.Profile()
+    return prof
+
+
+# --- public API ----------------------------------------------------------------
+
+def enabled() -> bool:
+    return _state.enabled
+
+
+def enable(profile=(), tracemalloc=(), profile_dir: Optional[str] = None) -> None:
+    _state.enabled = True
+    _state.profile = frozenset(profile)
+    _state.tracemalloc = frozenset(tracemalloc)
+    if profile_dir:
+        _state.profile_dir = Path(profile_dir)
+
+
+def disable() -> None:
+    _state.enabled = False
+
+
+def reset() -> None:
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _profilers.clear()
+
+
+def stage(name: str):
+    """Context manager timing one execution of `name`."""
+    return _Stage(name) if _state.enabled else _NOOP
+
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, value: float = 1, stage: str = "") -> None:
+    """Add to a counter, e.g. count("bytes", len(data), stage="hash")."""
+    if not _state.enabled:
+        return
+    key = (name, stage)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def snapshot() -> dict:
+    with _lock:
+        stages = {
+            name: {
+                "calls": s.calls,
+                "total_seconds": s.total,
+                "max_seconds": s.max,
+                "mean_seconds": s.total / s.calls if s.calls else 0.0,
+                "buckets": {str(b): n for b, n in zip(BUCKETS + ("+Inf",), s.buckets)},
+                "peak_alloc_bytes": s.peak_alloc or None,
+            }
+            for name, s in sorted(_stages.items())
+        }
+        counters = [
+            {"name": name, "stage": stg, "value": v} for (name, stg), v in sorted(_counters.items())
+        ]
+    return {"stages": stages, "counters": counters}
+
+
+def to_json(snap: Optional[dict] = None) -> str:
+    return json.dumps(snap or snapshot(), indent=2, sort_keys=True)
+
+
+def to_prometheus(snap: Optional[dict] = None) -> str:
+    snap = snap or snapshot()
+    lines: List[str] = [
+        "# HELP paygod_stage_duration_seconds Wall time per stage execution.",
+        "# TYPE paygod_stage_duration_seconds histogram",
+    ]
+    for name, s in snap["stages"].items():
+        cumulative = 0
+        for le, n in s["buckets"].items():
+            cumulative += n
+            lines.append(f'paygod_stage_duration_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'paygod_stage_duration_seconds_sum{{stage="{name}"}} {s["total_seconds"]:.9f}')
+        lines.append(f'paygod_stage_duration_seconds_count{{stage="{name}"}} {s["calls"]}')
+    lines += [
+        "# HELP paygod_stage_calls_total Executions per stage.",
+        "# TYPE paygod_stage_calls_total counter",
+    ]
+    for name, s in snap["stages"].items():
+        lines.append(f'paygod_stage_calls_total{{stage="{name}"}} {s["calls"]}')
+    lines += [
+        "# HELP paygod_stage_peak_alloc_bytes Peak traced allocation above the level on stage entry.",
+        "# TYPE paygod_stage_peak_alloc_bytes gauge",
+    ]
+    for name, s in snap["stages"].items():
+        if s["peak_alloc_bytes"]:
+            lines.append(f'paygod_stage_peak_alloc_bytes{{stage="{name}"}} {s["peak_alloc_bytes"]}')
+    by_name: Dict[str, list] = {}
+    for c in snap["counters"]:
+        by_name.setdefault(c["name"], []).append(c)
+    for name, items in sorted(by_name.items()):
+        metric = f"paygod_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for c in items:
+            labels = f'{{stage="{c["stage"]}"}}' if c["stage"] else ""
+            lines.append(f"{metric}{labels} {_sample(c['value'])}")
+    return "\n".join(lines) + "\n"
+
+
+def _sample(value) -> str:
+    """Exact sample text: integral values without exponent or rounding."""
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer()):
+        return str(int(value))
+    return repr(float(value))
+
+
+def dump(path) -> None:
+    """Write a snapshot; `.prom`/`.txt` => Prometheus text, anything else => JSON."""
+    path = Path(path)
+    text = to_prometheus() if path.suffix in (".prom", ".txt") else to_json() + "\n"
+    path.write_text(text, encoding="utf-8")
+    dump_profiles()
+
+
+def dump_profiles() -> None:
+    if not _profilers:
+        return
+    _state.profile_dir.mkdir(parents=True, exist_ok=True)
+    for name, prof in _profilers.items():
+        prof.dump_stats(str(_state.profile_dir / f"{name}.prof"))
+
+
+def serve(port: int = 9464, host: str = "127.0.0.1"):
+    """Expose /metrics and /metrics.json from a daemon thread; returns the server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, ctype = to_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, ctype = to_json().encode("utf-8"), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _split(value: str) -> frozenset:
+    return frozenset(x.strip() for x in value.split(",") if x.strip())
+
+
+def _configure_from_env() -> None:
+    profile = _split(os.environ.get("PAYGOD_PROFILE", ""))
+    traced = _split(os.environ.get("PAYGOD_TRACEMALLOC", ""))
+    if os.environ.get("PAYGOD_METRICS", "").lower() in ("1", "true", "yes") or profile or traced:
+        enable(profile=profile, tracemalloc=traced, profile_dir=os.environ.get("PAYGOD_PROFILE_DIR"))
+    out = os.environ.get("PAYGOD_METRICS_OUT")
+    if out and _state.enabled:
+        atexit.register(dump, out)
+    elif _state.enabled and profile:
+        atexit.register(dump_profiles)
+
+
+_configure_from_env()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 2:
+        print("usage: python tools/instrument.py <snapshot.json>", file=sys.stderr)
+        raise SystemExit(2)
+    print(to_prometheus(json.loads(Path(sys.argv[1]).read_text(encoding="utf-8"))), end="")
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Secondary indexes for JSONL ledgers (one entry per line, e.g. ledger.jsonl).
+
+Sidecar directory <ledger>.idx/ holds append-only files of int64 values:
+- offsets.bin        per entry position: byte offset (q) + line length (q)
+- time.bin           timestamps in epoch microseconds (q), non-decreasing, searched by bisection
+- time_pos.bin       the position of each time.bin value (q)
+- time_late.bin      timestamp (q) + position (q) of entries older than the latest indexed
+                     timestamp (out-of-order appends), scanned linearly
+- types/<sha256>.bin posting list of positions per record_type (q); the file is
+                     named by sha256(record_type), so a type can never escape the
+                     directory, and state.json maps names back to types
+- ids.<gen>.bin      entry_id lookup: 24-byte records (16 raw uuid bytes + position,
+                     little-endian q) sorted by uuid, searched by bisection
+- ids-tail.<gen>.bin the same records for recent appends, unsorted, searched with
+                     mmap.find. When the tail outgrows max(ID_TAIL_MIN, sorted / 4) it
+                     is merged into a new generation of the sorted file.
+- state.json         format version, bytes of the ledger already indexed, the length of
+                     every index file, the id generation and the posting-list name map
+
+Files are read through mmap and never loaded whole, so opening an index costs
+the same for 1k or 10M entries. Indexes are extended incrementally:
+IndexedLedger updates them on every append, and LedgerIndex.update() catches up
+with lines appended by other writers. Index files are truncated back to the
+lengths in state.json on open, so an interrupted write cannot leave
+half-indexed entries. An index from an older format is rebuilt.
+
+Queries resolve to byte offsets and decode only the matching lines.
+
+Usage:
+  python tools/ledger_index.py build ledger.jsonl
+  python tools/ledger_index.py query ledger.jsonl --type decision --since 2026-01-01T00:00:00Z --until 2026-02-01T00:00:00Z
+  python tools/ledger_index.py query ledger.jsonl --id 3f0c...-...
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import instrument
+from simulate_ledger import Ledger
+
+INDEX_VERSION = 2
+ITEM = "q"
+ID_RECORD = struct.Struct("<16sq")
+ID_TAIL_MIN = 65536
+
+
+def to_micros(timestamp: str) -> int:
+    dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1_000_000)
+
+
+class _MappedFile:
+    """An append-only file of fixed-size records, read through mmap."""
+
+    record_size = 1
+
+    def __init__(self, path: Path, committed_len: int):
+        self.path = path
+        self._fh = open(path, "a+b")
+        self._fh.truncate(committed_len * self.record_size)
+        self._len = committed_len
+        self._map: Optional[mmap.mmap] = None
+        self._mapped = -1
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _write(self, data: bytes) -> None:
+        self._fh.write(data)
+        self._len += len(data) // self.record_size
+
+    def mapped(self) -> Optional[mmap.mmap]:
+        """The committed records (None when empty); remapped after appends."""
+        if self._mapped != self._len:
+            self._fh.flush()
+            # Older maps are left to the garbage collector: views may still use them.
+            self._map = (mmap.mmap(self._fh.fileno(), self._len * self.record_size, access=mmap.ACCESS_READ)
+                         if self._len else None)
+            self._mapped = self._len
+        return self._map
+
+    def flush(self) -> None:
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._map = None
+        self._fh.close()
+
+
+class _ArrayFile(_MappedFile):
+    """int64 values."""
+
+    record_size = array(ITEM).itemsize
+
+    def extend(self, values) -> None:
+        self._write(array(ITEM, values).tobytes())
+
+    def view(self):
+        m = self.mapped()
+        return memoryview(m).cast(ITEM) if m is not None else memoryview(array(ITEM))
+
+
+class _IdFile(_MappedFile):
+    """(uuid bytes, position) records."""
+
+    record_size = ID_RECORD.size
+
+    def add(self, key: bytes, pos: int) -> None:
+        self._write(ID_RECORD.pack(key, pos))
+
+    def bisect(self, key: bytes) -> Optional[int]:
+        m = self.mapped()
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at = mid * self.record_size
+            if m[at:at + 16] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        at = lo * self.record_size
+        if lo < len(self) and m[at:at + 16] == key:
+            return ID_RECORD.unpack_from(m, at)[1]
+        return None
+
+    def scan(self, key: bytes) -> Optional[int]:
+        m = self.mapped()
+        if m is None:
+            return None
+        found = m.find(key)
+        while found != -1:
+            if found % self.record_size == 0:
+                return ID_RECORD.unpack_from(m, found)[1]
+            found = m.find(key, found + 1)
+        return None
+
+    def records(self) -> List[Tuple[bytes, int]]:
+        m = self.mapped()
+        return list(ID_RECORD.iter_unpack(m)) if m is not None else []
+
+
+class LedgerIndex:
+    def __init__(self, ledger_path):
+        self.ledger_path = Path(ledger_path)
+        self.dir = self.ledger_path.with_name(self.ledger_path.name + ".idx")
+        (self.dir / "types").mkdir(parents=True, exist_ok=True)
+        state_path = self.dir / "state.json"
+        state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+        ledger_size = self.ledger_path.stat().st_size if self.ledger_path.exists() else 0
+        if state.get("version") != INDEX_VERSION or state.get("indexed_bytes", 0) > ledger_size:
+            # Missing, written by an older format, or ahead of the ledger: rebuild from scratch.
+            for p in [*self.dir.glob("*.bin"), *(self.dir / "types").glob("*.bin")]:
+                p.unlink()
+            state = {}
+        lengths = state.get("lengths", {})
+        self.indexed_bytes = state.get("indexed_bytes", 0)
+        self._type_names: Dict[str, str] = state.get("types", {})
+        self._id_gen = state.get("id_gen", 0)
+
+        def array_file(name: str) -> _ArrayFile:
+            return _ArrayFile(self.dir / name, lengths.get(name, 0))
+
+        self._offsets = array_file("offsets.bin")
+        self._time = array_file("time.bin")
+        self._time_pos = array_file("time_pos.bin")
+        self._time_late = array_file("time_late.bin")
+        self._ids_sorted, self._ids_tail = self._id_files(self._id_gen, lengths)
+        self._types: Dict[str, _ArrayFile] = {}
+        for name, rtype in self._type_names.items():
+            self._types[rtype] = array_file(f"types/{name}.bin")
+        view = self._time.view()
+        self._last_ts = view[-1] if len(view) else None
+
+    def _id_files(self, gen: int, lengths: dict) -> Tuple[_IdFile, _IdFile]:
+        sorted_name, tail_name = f"ids.{gen}.bin", f"ids-tail.{gen}.bin"
+        return (_IdFile(self.dir / sorted_name, lengths.get(sorted_name, 0)),
+                _IdFile(self.dir / tail_name, lengths.get(tail_name, 0)))
+
+    def _files(self) -> List[_MappedFile]:
+        return [self._offsets, self._time, self._time_pos, self._time_late, self._ids_sorted, self._ids_tail,
+                *self._types.values()]
+
+    # --- building ---------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._offsets) // 2
+
+    def _postings(self, rtype: str) -> _ArrayFile:
+        postings = self._types.get(rtype)
+        if postings is None:
+            name = hashlib.sha256(rtype.encode("utf-8")).hexdigest()
+            postings = self._types[rtype] = _ArrayFile(self.dir / "types" / f"{name}.bin", 0)
+            self._type_names[name] = rtype
+        return postings
+
+    def add(self, entry: dict, offset: int, length: int) -> None:
+        """
+        Index one entry. Everything that can fail (timestamp parsing, opening the
+        posting list) happens before any index file is extended.
+        """
+        if len(self._ids_tail) >= max(ID_TAIL_MIN, len(self._ids_sorted) // 4):
+            self._merge_ids()  # between entries, so the state it flushes is consistent
+        pos = len(self)
+        ts = to_micros(entry["timestamp"])
+        postings = self._postings(entry.get("record_type", ""))
+        try:
+            eid = uuid.UUID(entry["entry_id"])
+        except (KeyError, ValueError):
+            eid = None
+
+        self._offsets.extend((offset, length))
+        self.indexed_bytes = offset + length
+        if self._last_ts is None or ts >= self._last_ts:
+            self._time.extend((ts,))
+            self._time_pos.extend((pos,))
+            self._last_ts = ts
+        else:
+            self._time_late.extend((ts, pos))
+        postings.extend((pos,))
+        if eid is not None:
+            self._ids_tail.add(eid.bytes, pos)
+
+    def _merge_ids(self) -> None:
+        """Merge the id tail into a new sorted generation, then switch state.json to it."""
+        records = self._ids_sorted.records() + sorted(self._ids_tail.records())
+        records.sort()  # two sorted runs: timsort merges them in linear time
+        gen = self._id_gen + 1
+        for name in (f"ids.{gen}.bin", f"ids-tail.{gen}.bin"):
+            (self.dir / name).unlink(missing_ok=True)
+        merged, tail = self._id_files(gen, {})
+        merged._write(b"".join(ID_RECORD.pack(k, p) for k, p in records))
+        old = (self._ids_sorted, self._ids_tail)
+        self._ids_sorted, self._ids_tail, self._id_gen = merged, tail, gen
+        self.flush()
+        for f in old:
+            f.close()
+            f.path.unlink()
+
+    @instrument.timed("ledger_index_update")
+    def update(self) -> int:
+        """Index lines appended to the ledger since the last update; returns how many."""
+        if not self.ledger_path.exists():
+            return 0
+        added = 0
+        with open(self.ledger_path, "rb") as f:
+            f.seek(self.indexed_bytes)
+            offset = self.indexed_bytes
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial line from a concurrent writer
+                if line.strip():
+                    self.add(json.loads(line), offset, len(line))
+                    added += 1
+                else:
+                    self.indexed_bytes = offset + len(line)
+                offset += len(line)
+        if added or not (self.dir / "state.json").exists():
+            self.flush()
+        return added
+
+    def flush(self) -> None:
+        files = self._files()
+        for f in files:
+            f.flush()
+        lengths = {str(f.path.relative_to(self.dir)).replace("\\", "/"): len(f) for f in files}
+        tmp = self.dir / "state.json.tmp"
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, "indexed_bytes": self.indexed_bytes,
+                                   "lengths": lengths, "id_gen": self._id_gen, "types": self._type_names}),
+                       encoding="utf-8")
+        os.replace(tmp, self.dir / "state.json")
+
+    def close(self) -> None:
+        self.flush()
+        for f in self._files():
+            f.close()
+
+    # --- queries ----------------------------------------------------------------
+
+    def positions(self, record_type: Optional[str] = None, since: Optional[str] = None,
+                  until: Optional[str] = None) -> List[int]:
+        """Positions matching all given filters, in ledger order. since/until are inclusive."""
+        candidates = None
+        if since is not None or until is not None:
+            lo_ts = to_micros(since) if since else None
+            hi_ts = to_micros(until) if until else None
+            ts = self._time.view()
+            lo = bisect.bisect_left(ts, lo_ts) if lo_ts is not None else 0
+            hi = bisect.bisect_right(ts, hi_ts) if hi_ts is not None else len(ts)
+            candidates = self._time_pos.view()[lo:hi].tolist()
+            late = self._time_late.view()
+            for i in range(0, len(late), 2):
+                if (lo_ts is None or late[i] >= lo_ts) and (hi_ts is None or late[i] <= hi_ts):
+                    candidates.append(late[i + 1])
+        if record_type is not None:
+            postings = self._types.get(record_type)
+            if postings is None:
+                return []
+            plist = postings.view().tolist()
+            if candidates is None:
+                return plist
+            if len(plist) < len(candidates):
+                wanted = set(candidates)
+                return [p for p in plist if p in wanted]
+            wanted = set(plist)
+            candidates = [p for p in candidates if p in wanted]
+        if candidates is None:
+            return list(range(len(self)))
+        return sorted(candidates)
+
+    def position_of(self, entry_id: str) -> Optional[int]:
+        """Position of an entry_id, or None when it is unknown or not a valid UUID."""
+        try:
+            key = uuid.UUID(entry_id).bytes
+        except (TypeError, ValueError):
+            return None
+        pos = self._ids_tail.scan(key)
+        return pos if pos is not None else self._ids_sorted.bisect(key)
+
+    def read(self, positions) -> Iterator[dict]:
+        offsets = self._offsets.view()
+        with open(self.ledger_path, "rb") as f:
+            for pos in positions:
+                f.seek(offsets[2 * pos])
+                yield json.loads(f.read(offsets[2 * pos + 1]))
+
+    @instrument.timed("ledger_query")
+    def query(self, record_type=None, since=None, until=None, limit=None) -> List[dict]:
+        positions = self.positions(record_type, since, until)
+        return list(self.read(positions[:limit] if limit else positions))
+
+    def get(self, entry_id: str) -> Optional[dict]:
+        pos = self.position_of(entry_id)
+        return next(self.read([pos])) if pos is not None else None
+
+
+class IndexedLedger:
+    """
+    JSONL-backed Ledger that keeps its sidecar indexes current on every append.
+    Only the head entry is kept in memory.
+    """
+
+    def __init__(self, path, store=None):
+        self.path = Path(path)
+        self.index = LedgerIndex(self.path)
+        self.index.update()
+        if len(self.index):
+            head = next(self.index.read([len(self.index) - 1]))
+            self.ledger = Ledger.from_chain([head], store=store)
+        else:
+            self.ledger = Ledger(store=store)
+        self._fh = open(self.path, "ab")
+        if not len(self.index):
+            self._write(self.ledger.chain[0])
+
+    def append(self, record_type, payload) -> dict:
+        head = self.ledger.chain[-1]
+        entry = self.ledger.append(record_type, payload)
+        try:
+            self._write(entry)
+        except Exception:
+            self.ledger.chain = [head]
+            raise
+        self.ledger.chain = [entry]
+        return entry
+
+    def _write(self, entry: dict) -> None:
+        # Index first: if indexing fails, the ledger line is never written.
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        offset = self._fh.tell()
+        self.index.add(entry, offset, len(line))
+        self._fh.write(line)
+
+    def query(self, record_type=None, since=None, until=None, limit=None) -> List[dict]:
+        self._fh.flush()
+        return self.index.query(record_type, since, until, limit)
+
+    def get(self, entry_id: str) -> Optional[dict]:
+        self._fh.flush()
+        return self.index.get(entry_id)
+
+    def flush(self) -> None:
+        self._fh.flush()
+        self.index.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paygod ledger secondary indexes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Create or catch up the sidecar index")
+    build.add_argument("ledger")
+    query = sub.add_parser("query", help="Query entries through the index")
+    query.add_argument("ledger")
+    query.add_argument("--type", dest="record_type")
+    query.add_argument("--since", help="Inclusive ISO-8601 lower bound")
+    query.add_argument("--until", help="Inclusive ISO-8601 upper bound")
+    query.add_argument("--id", dest="entry_id")
+    query.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    index = LedgerIndex(args.ledger)
+    added = index.update()
+    try:
+        if args.command == "build":
+            print(json.dumps({"entries": len(index), "added": added}))
+            return 0
+        if args.entry_id:
+            try:
+                uuid.UUID(args.entry_id)
+            except ValueError:
+                print(json.dumps({"error": f"invalid entry id: {args.entry_id}"}), file=sys.stderr)
+                return 2
+            entry = index.get(args.entry_id)
+            print(json.dumps(entry, ensure_ascii=False))
+            return 0 if entry else 1
+        for entry in index.query(args.record_type, args.since, args.until, args.limit):
+            print(json.dumps(entry, ensure_ascii=False))
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Batched Ed25519 signatures for ledger entries.
+
+An entry's `signature` is "ed25519:<base64>" over the 32-byte digest of its
+entry hash (simulate_ledger.entry_hash, which leaves `signature` out). Signing
+therefore never changes the hash chain and can happen after the appends.
+
+- append_many() appends a batch, then signs the new entries in chunks on a
+  process or thread pool. Workers load the key once and only receive digests.
+- verify_signed() walks the hash chain in the main process and hands each
+  chunk of signatures to the pool as soon as it is walked, so both proceed
+  together.
+- The verified-range cache is opt-in (--cache). It lives in a verifier-owned
+  directory ($XDG_CACHE_HOME/paygod/sigcache, mode 0700), never next to the
+  audited ledger. The file is keyed by the ledger's absolute path. Each range
+  holds a digest over the chunk's entry hashes and signatures and is
+  authenticated with an HMAC under a verifier-local secret (sigcache.key,
+  mode 0600). Ranges whose HMAC does not check out are ignored, so editing
+  the cache cannot skip signature checks. Unchanged chunks are not
+  re-verified on the next audit.
+
+Requires the optional `cryptography` package (pip install cryptography).
+
+Usage:
+  python tools/ledger_signing.py keygen --out ledger-key.pem
+  python tools/ledger_signing.py sign ledger.jsonl --key ledger-key.pem
+  python tools/ledger_signing.py verify ledger.jsonl --pub ledger-key.pub.pem [--cache]
+  python tools/ledger_signing.py bench --records 20000 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import instrument
+from simulate_ledger import Ledger, entry_hash
+
+PREFIX = "ed25519:"
+DEFAULT_CHUNK = 1024
+EXECUTORS = ("process", "thread")
+
+
+def _ed25519():
+    try:
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+    except ImportError:
+        raise RuntimeError("Ed25519 signing needs the 'cryptography' package (pip install cryptography)") from None
+    return ed25519
+
+
+# --- keys -----------------------------------------------------------------------
+
+def generate_key(path) -> Tuple[Path, Path]:
+    """Write a new private key (PKCS8 PEM, mode 0600) and its public key next to it."""
+    from cryptography.hazmat.primitives import serialization
+
+    key = _ed25519().Ed25519PrivateKey.generate()
+    path = Path(path)
+    pub_path = public_key_path(path)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption())
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    pub_path.write_bytes(key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                       serialization.PublicFormat.SubjectPublicKeyInfo))
+    return path, pub_path
+
+
+def public_key_path(private_path) -> Path:
+    private_path = Path(private_path)
+    return private_path.with_name(private_path.name.replace(".pem", "") + ".pub.pem")
+
+
+def load_private_key(path):
+    from cryptography.hazmat.primitives import serialization
+
+    _ed25519()
+    return serialization.load_pem_private_key(Path(path).read_bytes(), password=None)
+
+
+def load_public_key(path):
+    """Load a public key PEM; a private key PEM is accepted too."""
+    from cryptography.hazmat.primitives import serialization
+
+    _ed25519()
+    data = Path(path).read_bytes()
+    if b"PRIVATE KEY" in data:
+        return serialization.load_pem_private_key(data, password=None).public_key()
+    return serialization.load_pem_public_key(data)
+
+
+def key_fingerprint(public_key) -> str:
+    from cryptography.hazmat.primitives import serialization
+
+    raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return "sha256:" + hashlib.sha256(raw).hexdigest()
+
+
+def entry_digest(entry: dict) -> bytes:
+    return bytes.fromhex(entry_hash(entry).split(":", 1)[1])
+
+
+# --- workers ------------------------------------------------------------------------
+# Pool initializers load the key once per worker; chunks carry only digests.
+
+_KEY = None
+
+
+def _init_signer(key_path: str) -> None:
+    global _KEY
+    _KEY = load_private_key(key_path)
+
+
+def _init_verifier(pub_path: str) -> None:
+    global _KEY
+    _KEY = load_public_key(pub_path)
+
+
+def _sign_chunk(digests: Sequence[bytes]) -> List[str]:
+    return [PREFIX + base64.b64encode(_KEY.sign(d)).decode("ascii") for d in digests]
+
+
+def _verify_chunk(start: int, digests: Sequence[bytes], signatures: Sequence[Optional[str]]) -> List[int]:
+    """Return the entry positions in this chunk whose signature is missing or invalid."""
+    from cryptography.exceptions import InvalidSignature
+
+    bad = []
+    for i, (digest, sig) in enumerate(zip(digests, signatures)):
+        if not sig or not sig.startswith(PREFIX):
+            bad.append(start + i)
+            continue
+        try:
+            _KEY.verify(base64.b64decode(sig[len(PREFIX):]), digest)
+        except (InvalidSignature, ValueError):
+            bad.append(start + i)
+    return bad
+
+
+def _pool(executor: str, workers: Optional[int], initializer, arg):
+    if executor not in EXECUTORS:
+        raise ValueError(f"executor must be one of {EXECUTORS}")
+    cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    return cls(max_workers=workers, initializer=initializer, initargs=(str(arg),))
+
+
+# --- signing ------------------------------------------------------------------------
+
+@instrument.timed("ledger_sign")
+def sign_entries(entries: Sequence[dict], key_path, workers: Optional[int] = None,
+                 executor: str = "process", chunk_size: int = DEFAULT_CHUNK) -> int:
+    """Attach a signature to every entry that has none; returns how many were signed."""
+    pending = [e for e in entries if "signature" not in e]
+    if not pending:
+        return 0
+    digests = [entry_digest(e) for e in pending]
+    chunks = [digests[i:i + chunk_size] for i in range(0, len(digests), chunk_size)]
+    if workers == 1 or len(chunks) == 1:
+        _init_signer(str(key_path))
+        results = map(_sign_chunk, chunks)
+    else:
+        pool = _pool(executor, workers, _init_signer, key_path)
+        with pool:
+            results = list(pool.map(_sign_chunk, chunks))
+    pos = 0
+    for sigs in results:
+        for sig in sigs:
+            pending[pos]["signature"] = sig
+            pos += 1
+    instrument.count("records", len(pending), stage="ledger_sign")
+    return len(pending)
+
+
+def append_many(ledger: Ledger, records: Iterable[Tuple[str, dict]], key_path, workers: Optional[int] = None,
+                executor: str = "process", chunk_size: int = DEFAULT_CHUNK) -> List[dict]:
+    """
+    Append a batch to an in-memory Ledger, then sign it together with the run of
+    unsigned entries directly before it (e.g. the genesis entry). The walk back
+    stops at the first signed entry, so a batch costs O(batch), not O(chain).
+    """
+    first = len(ledger.chain)
+    entries = [ledger.append(record_type, payload) for record_type, payload in records]
+    while first > 0 and "signature" not in ledger.chain[first - 1]:
+        first -= 1
+    sign_entries(ledger.chain[first:], key_path, workers=workers, executor=executor, chunk_size=chunk_size)
+    return entries
+
+
+# --- verification -------------------------------------------------------------------
+
+def _chunk_digest(hashes: Sequence[bytes], signatures: Sequence[Optional[str]]) -> str:
+    h = hashlib.sha256()
+    for digest, sig in zip(hashes, signatures):
+        h.update(digest)
+        h.update((sig or "").encode("ascii", "replace"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "paygod" / "sigcache"
+
+
+def default_cache_path(ledger_path) -> Path:
+    """Verifier-owned cache file for a ledger, keyed by its absolute path."""
+    key = hashlib.sha256(str(Path(ledger_path).resolve()).encode("utf-8")).hexdigest()
+    return cache_dir() / f"{key}.json"
+
+
+def local_cache_secret(directory: Optional[Path] = None) -> bytes:
+    """The verifier-local HMAC secret, created on first use."""
+    directory = Path(directory) if directory else cache_dir()
+    directory.mkdir(parents=True, exist_ok=True, mode=0o700)
+    path = directory / "sigcache.key"
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return path.read_bytes()
+    secret = os.urandom(32)
+    with os.fdopen(fd, "wb") as f:
+        f.write(secret)
+    return secret
+
+
+def _range_mac(secret: bytes, fingerprint: str, chunk_size: int, rng: dict) -> str:
+    message = f"{fingerprint}|{chunk_size}|{rng['start']}|{rng['end']}|{rng['digest']}".encode("utf-8")
+    return hmac.new(secret, message, hashlib.sha256).hexdigest()
+
+
+def _load_cache(path: Optional[Path], secret: bytes, fingerprint: str, chunk_size: int) -> dict:
+    if path is None or not path.exists():
+        return {}
+    try:
+        cache = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+    if cache.get("public_key") != fingerprint or cache.get("chunk_size") != chunk_size:
+        return {}
+    ranges = {}
+    for r in cache.get("ranges", []):
+        try:
+            expected = _range_mac(secret, fingerprint, chunk_size, r)
+        except (KeyError, TypeError):
+            continue
+        if hmac.compare_digest(expected, str(r.get("mac", ""))):
+            ranges[r["start"]] = r
+    return ranges
+
+
+def _save_cache(path: Path, secret: bytes, fingerprint: str, chunk_size: int, ranges: List[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    signed = [dict(r, mac=_range_mac(secret, fingerprint, chunk_size, r)) for r in ranges]
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"public_key": fingerprint, "chunk_size": chunk_size, "ranges": signed}),
+                   encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@instrument.timed("ledger_verify_signed")
+def verify_signed(entries: Iterable[dict], pub_path, workers: Optional[int] = None, executor: str = "process",
+                  chunk_size: int = DEFAULT_CHUNK, cache_path=None,
+                  cache_secret: Optional[bytes] = None) -> Tuple[bool, List[str]]:
+    """
+    Check the hash chain and every entry signature. Signature chunks are verified
+    on the pool while the chain walk continues. With cache_path, chunks verified
+    by an earlier run (same key, same entry hashes and signatures, range HMAC
+    valid under cache_secret) are skipped. cache_secret defaults to
+    local_cache_secret(); cache_path must not be writable by whoever produces
+    the ledger.
+    """
+    public_key = load_public_key(pub_path)
+    fingerprint = key_fingerprint(public_key)
+    cache_path = Path(cache_path) if cache_path else None
+    if cache_path is not None and cache_secret is None:
+        cache_secret = local_cache_secret()
+    cached = _load_cache(cache_path, cache_secret, fingerprint, chunk_size)
+    problems: List[str] = []
+    verified: List[dict] = []
+    futures = []
+    skipped = 0
+
+    inline = workers == 1
+    if inline:
+        _init_verifier(str(pub_path))
+    pool = None if inline else _pool(executor, workers, _init_verifier, pub_path)
+    try:
+        prev_hash = None
+        start = 0
+        hashes: List[bytes] = []
+        sigs: List[Optional[str]] = []
+
+        def flush() -> None:
+            nonlocal skipped
+            if not hashes:
+                return
+            rng = {"start": start, "end": start + len(hashes) - 1, "digest": _chunk_digest(hashes, sigs)}
+            hit = cached.get(start)
+            if hit is not None and hit["end"] == rng["end"] and hit["digest"] == rng["digest"]:
+                skipped += len(hashes)
+                verified.append(rng)
+                return
+            if inline:
+                futures.append((rng, _verify_chunk(start, list(hashes), list(sigs))))
+            else:
+                futures.append((rng, pool.submit(_verify_chunk, start, list(hashes), list(sigs))))
+
+        for pos, entry in enumerate(entries):
+            current = entry_hash(entry)
+            if prev_hash is not None and entry["prev_hash"] != prev_hash:
+                problems.append(f"entry {entry.get('entry_index', pos)}: chain broken")
+            prev_hash = current
+            hashes.append(bytes.fromhex(current.split(":", 1)[1]))
+            sigs.append(entry.get("signature"))
+            if len(hashes) == chunk_size:
+                flush()
+                start += len(hashes)
+                hashes, sigs = [], []
+        flush()
+
+        for rng, result in futures:
+            bad = result if inline else result.result()
+            if bad:
+                problems += [f"entry {pos}: signature missing or invalid" for pos in bad]
+            else:
+                verified.append(rng)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    instrument.count("cached_entries", skipped, stage="ledger_verify_signed")
+    if cache_path is not None:
+        _save_cache(cache_path, cache_secret, fingerprint, chunk_size, sorted(verified, key=lambda r: r["start"]))
+    return not problems, problems
+
+
+# --- JSONL files ----------------------------------------------------------------------
+
+def _read_jsonl(path: Path) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _iter_jsonl(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _write_jsonl(path: Path, entries: Iterable[dict]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for e in entries:
+            f.write(json.dumps(e, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paygod ledger signatures (Ed25519)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    keygen = sub.add_parser("keygen", help="Create a signing key and its public key")
+    keygen.add_argument("--out", required=True, help="Private key path; the public key is written to *.pub.pem")
+
+    sign = sub.add_parser("sign", help="Sign unsigned entries of a JSONL ledger in place")
+    sign.add_argument("ledger")
+    sign.add_argument("--key", required=True)
+
+    verify = sub.add_parser("verify", help="Verify the chain and signatures of a JSONL ledger")
+    verify.add_argument("ledger")
+    verify.add_argument("--pub", required=True, help="Public (or private) key PEM")
+    verify.add_argument("--cache", action="store_true",
+                        help="Reuse verified ranges from the verifier-owned cache (see cache_dir())")
+
+    bench = sub.add_parser("bench", help="Compare signed and unsigned append/verify throughput")
+    bench.add_argument("--records", type=int, default=20000)
+
+    for p in (sign, verify, bench):
+        p.add_argument("--workers", type=int, default=None)
+        p.add_argument("--executor", choices=EXECUTORS, default="process")
+        p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    args = parser.parse_args()
+
+    if args.command == "keygen":
+        key, pub = generate_key(args.out)
+        print(json.dumps({"key": str(key), "public_key": str(pub)}))
+        return 0
+
+    if args.command == "sign":
+        path = Path(args.ledger)
+        entries = _read_jsonl(path)
+        signed = sign_entries(entries, args.key, args.workers, args.executor, args.chunk_size)
+        if signed:
+            _write_jsonl(path, entries)
+        print(json.dumps({"entries": len(entries), "signed": signed}))
+        return 0
+
+    if args.command == "verify":
+        path = Path(args.ledger)
+        cache = default_cache_path(path) if args.cache else None
+        ok, problems = verify_signed(_iter_jsonl(path), args.pub, args.workers, args.executor,
+                                     args.chunk_size, cache_path=cache)
+        print(json.dumps({"ok": ok, "problems": problems}, indent=2))
+        return 0 if ok else 1
+
+    import tempfile
+
+    records = [("observation", {"source": "bench", "amount": n}) for n in range(args.records)]
+    with tempfile.TemporaryDirectory() as tmp:
+        key, pub = generate_key(Path(tmp) / "bench.pem")
+        timings = {}
+        start = time.perf_counter()
+        plain = Ledger()
+        for record_type, payload in records:
+            plain.append(record_type, payload)
+        timings["append"] = time.perf_counter() - start
+        start = time.perf_counter()
+        plain.verify()
+        timings["verify"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        signed = Ledger()
+        append_many(signed, records, key, args.workers, args.executor, args.chunk_size)
+        timings["append_signed"] = time.perf_counter() - start
+        cache = Path(tmp) / "bench.sigcache.json"
+        secret = local_cache_secret(Path(tmp))
+        start = time.perf_counter()
+        ok, _ = verify_signed(signed.chain, pub, args.workers, args.executor, args.chunk_size, cache_path=cache,
+                              cache_secret=secret)
+        timings["verify_signed"] = time.perf_counter() - start
+        start = time.perf_counter()
+        verify_signed(signed.chain, pub, args.workers, args.executor, args.chunk_size, cache_path=cache,
+                      cache_secret=secret)
+        timings["verify_signed_cached"] = time.perf_counter() - start
+
+    print(json.dumps({
+        "records": args.records,
+        "verified": ok,
+        **{k: round(v, 4) for k, v in timings.items()},
+        **{f"{k}_per_s": round(args.records / v, 1) for k, v in timings.items() if v},
+    }, indent=2))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
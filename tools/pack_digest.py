@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Merkle digest of a pack directory, with a per-file cache.
+
+Every file under the pack (examples/ and tests/ included) is a leaf, ordered by
+its relative POSIX path (UTF-8 bytes):
+
+  leaf = sha256(0x00 || path || 0x00 || sha256(file bytes))
+  node = sha256(0x01 || left || right)      an odd node is promoted unchanged
+  root = the single node left (sha256 of nothing for an empty pack)
+
+The root identifies the whole directory. It is not the receipt field
+`pack.digest_sha256`, which `paygod run` computes as sha256 of the pack.yaml
+bytes only (src/PayGod.Cli/Commands/RunCommand.cs): editing a rule file,
+example or test changes the root but not that field.
+
+File digests are cached by relative path with their (size, mtime_ns, inode).
+A file is re-hashed only when its stat changes, or when its mtime falls within
+RACY_WINDOW_NS of the moment it was cached (an edit in the same timestamp tick
+would otherwise go unseen). --confirm re-hashes everything and reports cache
+entries that no longer match the content.
+
+The tree levels are cached too. When the file list is unchanged, only the
+parents of changed leaves are recomputed: one file edit costs one file hash
+plus one node per tree level.
+
+Changed files are hashed on a thread pool (hashlib releases the GIL).
+Files of MMAP_THRESHOLD bytes or more are read through mmap.
+
+Cache: .paygod-cache/pack-digests.json
+
+Usage:
+  python tools/pack_digest.py packs/core/*
+  python tools/pack_digest.py packs/core/critical-cve-blocker --json --confirm
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE = ROOT / ".paygod-cache" / "pack-digests.json"
+MMAP_THRESHOLD = 64 * 1024
+RACY_WINDOW_NS = 2_000_000_000
+IGNORE_DIRS = {"__pycache__", ".git"}
+IGNORE_SUFFIXES = (".pyc",)
+
+
+@dataclass(frozen=True)
+class PackDigest:
+    pack: str
+    root: str
+    files: int
+    rehashed: int
+    nodes_hashed: int
+    cache_mismatches: int = 0
+
+
+def file_sha256(path: Path, size: int) -> bytes:
+    with open(path, "rb") as f:
+        if size < MMAP_THRESHOLD:
+            return hashlib.sha256(f.read()).digest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return hashlib.sha256(m).digest()
+
+
+def leaf_hash(rel: str, content: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + rel.encode("utf-8") + b"\x00" + content).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def build_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        prev = levels[-1]
+        levels.append([node_hash(prev[i], prev[i + 1]) if i + 1 < len(prev) else prev[i]
+                       for i in range(0, len(prev), 2)])
+    return levels
+
+
+def update_path(levels: List[List[bytes]], index: int, leaf: bytes) -> int:
+    """Replace one leaf and recompute its ancestors; returns how many nodes were hashed."""
+    levels[0][index] = leaf
+    hashed = 0
+    for depth in range(1, len(levels)):
+        index //= 2
+        prev = levels[depth - 1]
+        left = 2 * index
+        if left + 1 < len(prev):
+            levels[depth][index] = node_hash(prev[left], prev[left + 1])
+            hashed += 1
+        else:
+            levels[depth][index] = prev[left]
+    return hashed
+
+
+def merkle_root(levels: List[List[bytes]]) -> str:
+    if not levels[0]:
+        return hashlib.sha256(b"").hexdigest()
+    return levels[-1][0].hex()
+
+
+def list_files(pack_dir: Path) -> List[Tuple[str, os.stat_result]]:
+    """(relative POSIX path, stat) for every file under pack_dir, in digest order."""
+    found = []
+    stack = [(pack_dir, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORE_DIRS:
+                        stack.append((Path(entry.path), prefix + entry.name + "/"))
+                elif entry.is_file() and not entry.name.endswith(IGNORE_SUFFIXES):
+                    found.append((prefix + entry.name, entry.stat()))
+    found.sort(key=lambda item: item[0].encode("utf-8"))
+    return found
+
+
+class PackDigester:
+    def __init__(self, cache_path: Optional[Path] = DEFAULT_CACHE, workers: Optional[int] = None):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.workers = workers
+        self._packs: Dict[str, dict] = {}
+        if self.cache_path is not None and self.cache_path.exists():
+            try:
+                self._packs = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except ValueError:
+                self._packs = {}
+        self._dirty = False
+
+    def digest(self, pack_dir, confirm: bool = False) -> PackDigest:
+        pack_dir = Path(pack_dir)
+        key = str(pack_dir.resolve())
+        cached = self._packs.get(key, {})
+        cached_files: Dict[str, list] = cached.get("files", {})
+        cached_at = cached.get("written_ns", 0)
+
+        listing = list_files(pack_dir)
+        stamps = {}
+        todo = []
+        for rel, st in listing:
+            stamp = [st.st_size, st.st_mtime_ns, st.st_ino]
+            stamps[rel] = stamp
+            hit = cached_files.get(rel)
+            racy = st.st_mtime_ns + RACY_WINDOW_NS >= cached_at
+            if confirm or hit is None or hit[:3] != stamp or racy:
+                todo.append((rel, st.st_size))
+
+        started = time.time_ns()
+        if len(todo) > 1 and self.workers != 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                digests = list(pool.map(lambda item: file_sha256(pack_dir / item[0], item[1]), todo))
+        else:
+            digests = [file_sha256(pack_dir / rel, size) for rel, size in todo]
+
+        files = {rel: list(stamps[rel]) + [cached_files[rel][3]] for rel, _ in listing if rel in cached_files}
+        mismatches = 0
+        changed = set()
+        for (rel, _), content in zip(todo, digests):
+            hexdigest = content.hex()
+            previous = cached_files.get(rel)
+            if previous is None or previous[3] != hexdigest:
+                changed.add(rel)
+                if previous is not None and previous[:3] == stamps[rel]:
+                    mismatches += 1
+            files[rel] = stamps[rel] + [hexdigest]
+
+        order = [rel for rel, _ in listing]
+        nodes = 0
+        if order == cached.get("order") and "levels" in cached:
+            levels = [[bytes.fromhex(h) for h in level] for level in cached["levels"]]
+            for i, rel in enumerate(order):
+                if rel in changed:
+                    nodes += update_path(levels, i, leaf_hash(rel, bytes.fromhex(files[rel][3])))
+        else:
+            leaves = [leaf_hash(rel, bytes.fromhex(files[rel][3])) for rel in order]
+            levels = build_levels(leaves)
+            nodes = sum(len(level) for level in levels[1:])
+
+        if todo or order != cached.get("order"):
+            self._packs[key] = {
+                "written_ns": started,
+                "order": order,
+                "files": files,
+                "levels": [[h.hex() for h in level] for level in levels],
+            }
+            self._dirty = True
+        return PackDigest(pack=str(pack_dir), root=merkle_root(levels), files=len(order), rehashed=len(todo),
+                          nodes_hashed=nodes, cache_mismatches=mismatches)
+
+    def save(self) -> None:
+        if self.cache_path is None or not self._dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        tmp.write_text(json.dumps(self._packs, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.cache_path)
+        self._dirty = False
+
+
+def pack_digest(pack_dir, cache_path: Optional[Path] = DEFAULT_CACHE) -> str:
+    """Merkle root (hex) of a pack directory, using and updating the cache."""
+    digester = PackDigester(cache_path)
+    result = digester.digest(pack_dir)
+    digester.save()
+    return result.root
+
+
+def main(argv=None, digester: Optional[PackDigester] = None) -> int:
+    parser = argparse.ArgumentParser(description="Merkle digest of pack directories")
+    parser.add_argument("packs", nargs="+", help="Pack directories")
+    parser.add_argument("--json", action="store_true", help="One JSON object per pack, with cache statistics")
+    parser.add_argument("--confirm", action="store_true", help="Re-hash every file and report stale cache entries")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the digest cache")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE))
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if digester is None:
+        digester = PackDigester(None if args.no_cache else Path(args.cache), workers=args.workers)
+    elif args.workers:
+        digester.workers = args.workers
+    rc = 0
+    for pack in args.packs:
+        if not Path(pack).is_dir():
+            print(json.dumps({"pack": pack, "error": "not a directory"}) if args.json else f"error: {pack}: not a directory")
+            rc = 2
+            continue
+        result = digester.digest(pack, confirm=args.confirm)
+        if args.json:
+            print(json.dumps(result.__dict__))
+        else:
+            print(f"{result.root}  {result.pack}")
+        if result.cache_mismatches:
+            rc = rc or 1
+    digester.save()
+    return rc
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,6 +6,8 @@ from pathlib import Path
 import yaml
 from jsonschema import Draft202012Validator
 
+import instrument
+
 
 def load_json(path: Path):
     return json.loads(path.read_text(encoding="utf-8"))
@@ -24,11 +26,15 @@ def iter_pack_yamls(packs_root: Path, include_drafts: bool):
         yield p
 
 
-def main():
+def main(argv=None, validator=None, load_pack=load_yaml):
+    """
+    argv/validator/load_pack let tools/paygod_tools.py run this in-process
+    with a warm validator and cached pack documents.
+    """
     repo_root = Path(os.environ.get("GITHUB_WORKSPACE", Path.cwd())).resolve()
 
     # allow args:
-    include_drafts = "--include-drafts" in sys.argv
+    include_drafts = "--include-drafts" in (sys.argv if argv is None else argv)
 
     schema_path = repo_root / "contracts" / "schemas" / "pack.schema.json"
     packs_root = repo_root / "packs"
@@ -41,8 +47,8 @@ def main():
         print(json.dumps({"ok": False, "code": "PACKS_DIR_MISSING", "message": f"Missing packs dir: {packs_root}"}))
         return 2
 
-    schema = load_json(schema_path)
-    validator = Draft202012Validator(schema)
+    if validator is None:
+        validator = Draft202012Validator(load_json(schema_path))
 
     pack_files = list(iter_pack_yamls(packs_root, include_drafts=include_drafts))
     if not pack_files:
@@ -52,7 +58,7 @@ def main():
     errors = []
     for pack_path in pack_files:
         try:
-            doc = load_yaml(pack_path)
+            doc = load_pack(pack_path)
         except Exception as e:
             errors.append({
                 "file": str(pack_path.relative_to(repo_root)).replace("\\", "/"),
@@ -69,7 +75,9 @@ def main():
             })
             continue
 
-        v_errors = sorted(validator.iter_errors(doc), key=lambda e: e.path)
+        instrument.count("records", stage="schema_validate")
+        with instrument.stage("schema_validate"):
+            v_errors = sorted(validator.iter_errors(doc), key=lambda e: e.path)
         if v_errors:
             for e in v_errors:
                 errors.append({
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+paygod-tools: single entry point for the Python tooling.
+
+Subcommands (heavy imports such as jsonschema/yaml/jcs happen only inside the
+subcommand that needs them):
+  validate -s SCHEMA -i INSTANCE    same output as tools/validate.py
+  pack-validate [--include-drafts]  same output as tools/pack_validate.py
+  verify-spec                       same output as tools/verify_spec.py
+  check-manifest                    same output as tools/check_schema_manifest.py
+  hash FILE...                      RFC 8785 canonical sha256 of JSON files
+  pack-digest PACK_DIR...           Merkle digest of pack directories (tools/pack_digest.py)
+  daemon [--socket PATH]            serve the subcommands above on a Unix socket
+
+Client behaviour:
+If a daemon is listening on PAYGOD_TOOLS_SOCKET (default: $XDG_RUNTIME_DIR/paygod-tools.sock,
+else <tmp>/paygod-tools-<uid>/daemon.sock in a 0700 directory) the request is
+forwarded to it; otherwise the subcommand runs in-process. The client only
+talks to a socket owned by the current user, in a directory no one else can
+write to; anything else is ignored with a warning.
+`--no-daemon` (first argument) forces in-process execution.
+
+The daemon keeps modules imported and caches parsed schemas, pack documents and
+compiled validators keyed by (path, size, mtime), so repeated CI calls avoid
+interpreter start-up and schema reloads. Requests are served one at a time.
+It also records the (size, mtime) of every tools/*.py at start-up; when any of
+them change it refuses the request (the client then runs in-process) and
+re-executes itself, so an edited tool is never served from stale modules.
+
+Usage:
+  python tools/paygod_tools.py daemon &
+  python tools/paygod_tools.py validate -s contracts/schemas/observation.schema.json -i tests/fixtures/observation.sample.json
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import stat
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+FORWARDED_ENV = ("CI", "GITHUB_WORKSPACE")
+
+
+def default_socket_path() -> str:
+    if os.environ.get("PAYGOD_TOOLS_SOCKET"):
+        return os.environ["PAYGOD_TOOLS_SOCKET"]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], "paygod-tools.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    # tempfile is avoided on purpose: it costs more to import than the whole client.
+    tmp = os.environ.get("TMPDIR") or os.environ.get("TEMP") or "/tmp"
+    return os.path.join(tmp, f"paygod-tools-{uid}", "daemon.sock")
+
+
+def _private_dir(path: str) -> bool:
+    """True if `path` is a directory owned by us that no one else can write to."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def _own_socket(path: str) -> bool:
+    """True if `path` is a Unix socket owned by us in a private directory."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+            and _private_dir(os.path.dirname(os.path.abspath(path))))
+
+
+# --- warm caches (live for the lifetime of the process) ---------------------
+
+_CACHE: dict = {}
+
+
+def _cached(kind: str, path: str, loader):
+    """Memoize loader(path) on (kind, path, size, mtime)."""
+    st = os.stat(path)
+    key = (kind, os.path.abspath(path))
+    stamp = (st.st_size, st.st_mtime_ns)
+    hit = _CACHE.get(key)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    value = loader(path)
+    _CACHE[key] = (stamp, value)
+    return value
+
+
+def _read_json(path: str):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _load_json(path: str):
+    return _cached("json", path, _read_json)
+
+
+def _schema_validator(path: str, format_checker=None):
+    def build(p):
+        from jsonschema.validators import validator_for
+
+        schema = _load_json(p)
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        return cls(schema, format_checker=format_checker)
+
+    return _cached("validator", path, build)
+
+
+# --- subcommands --------------------------------------------------------------
+
+def cmd_validate(argv) -> int:
+    import argparse
+
+    from jsonschema import ValidationError
+    from jsonschema.exceptions import best_match
+
+    import instrument
+    from validate import checker
+
+    parser = argparse.ArgumentParser(prog="paygod-tools validate", description="Paygod Strict Schema Validator")
+    parser.add_argument("--schema", "-s", required=True, help="Path to JSON Schema file")
+    parser.add_argument("--instance", "-i", required=True, help="Path to JSON data file")
+    args = parser.parse_args(argv)
+
+    try:
+        validator = _schema_validator(args.schema, format_checker=checker)
+        with open(args.instance, "r") as ifile:
+            instance = json.load(ifile)
+        instrument.count("records", stage="schema_validate")
+        with instrument.stage("schema_validate"):
+            error = best_match(validator.iter_errors(instance))
+        if error is not None:
+            raise error
+        print(json.dumps({"valid": True, "file": args.instance}))
+        return 0
+    except ValidationError as e:
+        print(json.dumps({
+            "valid": False,
+            "error": e.message,
+            "path": list(e.path),
+            "schema_path": list(e.schema_path)
+        }, indent=2))
+        return 1
+    except Exception as e:
+        print(json.dumps({"valid": False, "error": str(e)}))
+        return 2
+
+
+def cmd_pack_validate(argv) -> int:
+    import pack_validate
+
+    repo_root = os.environ.get("GITHUB_WORKSPACE", os.getcwd())
+    schema_path = os.path.join(repo_root, "contracts", "schemas", "pack.schema.json")
+    validator = None
+    if os.path.exists(schema_path):
+        from jsonschema import Draft202012Validator
+
+        validator = _cached("pack-validator", schema_path, lambda p: Draft202012Validator(_load_json(p)))
+    return pack_validate.main(
+        argv=argv,
+        validator=validator,
+        load_pack=lambda p: _cached("yaml", str(p), lambda _: pack_validate.load_yaml(p)),
+    )
+
+
+def cmd_verify_spec(argv) -> int:
+    import verify_spec
+
+    return verify_spec.main()
+
+
+def cmd_check_manifest(argv) -> int:
+    import check_schema_manifest
+
+    return check_schema_manifest.main()
+
+
+def cmd_hash(argv) -> int:
+    import hashlib
+
+    import jcs
+
+    if not argv:
+        print("usage: paygod-tools hash FILE...", file=sys.stderr)
+        return 2
+    rc = 0
+    for path in argv:
+        try:
+            digest = hashlib.sha256(jcs.canonicalize(_load_json(path))).hexdigest()
+            print(json.dumps({"file": path, "sha256": digest}))
+        except Exception as e:
+            print(json.dumps({"file": path, "error": str(e)}))
+            rc = 2
+    return rc
+
+
+def cmd_pack_digest(argv) -> int:
+    import pack_digest
+
+    # One digester per process: the daemon keeps per-file digests and tree levels in memory.
+    if "--no-cache" in argv or any(a.startswith("--cache") for a in argv):
+        return pack_digest.main(argv)
+    if "pack-digester" not in _CACHE:
+        _CACHE["pack-digester"] = pack_digest.PackDigester()
+    return pack_digest.main(argv, digester=_CACHE["pack-digester"])
+
+
+COMMANDS = {
+    "validate": cmd_validate,
+    "pack-validate": cmd_pack_validate,
+    "verify-spec": cmd_verify_spec,
+    "check-manifest": cmd_check_manifest,
+    "hash": cmd_hash,
+    "pack-digest": cmd_pack_digest,
+}
+
+
+def run_local(argv) -> int:
+    if not argv or argv[0] not in COMMANDS:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    if TOOLS_DIR not in sys.path:
+        sys.path.insert(0, TOOLS_DIR)
+    try:
+        return COMMANDS[argv[0]](argv[1:])
+    except SystemExit as e:  # argparse errors / scripts calling sys.exit
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 2)
+
+
+# --- daemon -------------------------------------------------------------------
+
+def _source_stamps() -> dict:
+    """(size, mtime) of each tools/*.py; the daemon's imported code comes from these."""
+    stamps = {}
+    with os.scandir(TOOLS_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".py") and entry.is_file():
+                st = entry.stat()
+                stamps[entry.name] = (st.st_size, st.st_mtime_ns)
+    return stamps
+
+
+def _serve_request(request: dict) -> dict:
+    import contextlib
+    import io
+
+    out, err = io.StringIO(), io.StringIO()
+    saved_cwd, saved_env = os.getcwd(), {k: os.environ.get(k) for k in FORWARDED_ENV}
+    try:
+        os.chdir(request.get("cwd") or saved_cwd)
+        for k in FORWARDED_ENV:
+            v = (request.get("env") or {}).get(k)
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                code = run_local(request.get("argv") or [])
+            except Exception as e:
+                print(f"paygod-tools daemon: {type(e).__name__}: {e}", file=sys.stderr)
+                code = 2
+    finally:
+        os.chdir(saved_cwd)
+        for k, v in saved_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    return {"exit_code": code, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+
+def run_daemon(argv) -> int:
+    import argparse
+    import signal
+    import socketserver
+
+    parser = argparse.ArgumentParser(prog="paygod-tools daemon")
+    parser.add_argument("--socket", default=default_socket_path(), help="Unix socket path")
+    args = parser.parse_args(argv)
+
+    sock_dir = os.path.dirname(os.path.abspath(args.socket))
+    if not os.path.exists(sock_dir):
+        os.makedirs(sock_dir, mode=0o700)
+    if not _private_dir(sock_dir):
+        print(f"refusing to listen in {sock_dir}: not a directory owned by this user and closed to others",
+              file=sys.stderr)
+        return 2
+    if os.path.lexists(args.socket):
+        if not _own_socket(args.socket):
+            print(f"refusing to replace {args.socket}: not a socket owned by this user", file=sys.stderr)
+            return 2
+        os.unlink(args.socket)  # stale socket from an earlier daemon
+
+    sources = _source_stamps()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                if _source_stamps() != sources:
+                    self.server.stale = True
+                    self.wfile.write(b'{"stale": true}\n')
+                    self.wfile.flush()
+                    return
+                try:
+                    response = _serve_request(json.loads(line))
+                except Exception as e:
+                    response = {"exit_code": 2, "stdout": "", "stderr": f"bad request: {e}\n"}
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    # Warm the common imports up front so the first request is fast too.
+    sys.path.insert(0, TOOLS_DIR)
+    import jcs  # noqa: F401
+    import jsonschema  # noqa: F401
+    import yaml  # noqa: F401
+
+    server = socketserver.UnixStreamServer(args.socket, Handler)
+    server.stale = False
+    os.chmod(args.socket, 0o600)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"paygod-tools daemon listening on {args.socket}", file=sys.stderr)
+    try:
+        while not server.stale:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if _own_socket(args.socket):
+            os.unlink(args.socket)
+    if server.stale:
+        print("paygod-tools daemon: tool sources changed, restarting", file=sys.stderr)
+        sys.stderr.flush()
+        os.execv(sys.executable, [sys.executable, os.path.join(TOOLS_DIR, "paygod_tools.py"), "daemon"] + argv)
+    return 0
+
+
+def run_remote(argv, socket_path: str):
+    """Forward to a running daemon; returns None if no daemon is reachable."""
+    import socket
+
+    if not hasattr(socket, "AF_UNIX") or not hasattr(os, "getuid") or not os.path.lexists(socket_path):
+        return None
+    if not _own_socket(socket_path):
+        print(f"paygod-tools: ignoring untrusted daemon socket {socket_path}", file=sys.stderr)
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            request = {"argv": argv, "cwd": os.getcwd(), "env": {k: os.environ.get(k) for k in FORWARDED_ENV}}
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    if not line:
+        return None
+    response = json.loads(line)
+    if response.get("stale"):
+        print("paygod-tools: daemon is restarting after a tool change; running in-process", file=sys.stderr)
+        return None
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit_code"]
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "daemon":
+        return run_daemon(argv[1:])
+    if argv and argv[0] == "--no-daemon":
+        return run_local(argv[1:])
+    code = run_remote(argv, default_socket_path())
+    return run_local(argv) if code is None else code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Local content-addressed payload store for references-only ledgers.
+
+Payloads are stored once per canonical sha256 (the same digest a ledger entry
+records as `record_hash`), so repeated observations cost one index lookup.
+
+Layout (<root>/):
+- seg-000000.pack, seg-000001.pack, ...  append-only segments of canonical JSON bytes
+- index.bin                              fixed-size records: digest(32) segment(u32) offset(u64) length(u32)
+
+A locator {"segment", "offset", "length"} addresses the bytes directly.
+Segments roll over at max_segment_bytes. The index is written after the
+segment bytes, so a crash can only leave unreferenced bytes behind.
+
+Usage:
+  python tools/payload_store.py --store .paygod-cache/payloads stats
+  python tools/payload_store.py --store .paygod-cache/payloads verify
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import struct
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from simulate_ledger import canonical_json
+
+INDEX_RECORD = struct.Struct(">32sIQI")
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+class PayloadStore:
+    def __init__(self, root, max_segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self._index: Dict[bytes, Tuple[int, int, int]] = {}
+        self._readers: Dict[int, object] = {}
+        self._load_index()
+
+        self._segment = max((loc[0] for loc in self._index.values()), default=0)
+        self._writer = open(self._segment_path(self._segment), "ab")
+        self._index_writer = open(self.root / "index.bin", "ab")
+        self.dedup_hits = 0
+
+    # --- write ------------------------------------------------------------
+
+    def put(self, payload) -> Tuple[str, dict]:
+        """Store a JSON payload; returns ("sha256:<hex>", locator)."""
+        return self.put_bytes(canonical_json(payload).encode("utf-8"))
+
+    def put_bytes(self, data: bytes) -> Tuple[str, dict]:
+        digest = hashlib.sha256(data).digest()
+        loc = self._index.get(digest)
+        if loc is not None:
+            self.dedup_hits += 1
+            return "sha256:" + digest.hex(), _locator(loc)
+
+        if self._writer.tell() and self._writer.tell() + len(data) > self.max_segment_bytes:
+            self._writer.close()
+            self._segment += 1
+            self._writer = open(self._segment_path(self._segment), "ab")
+
+        offset = self._writer.tell()
+        self._writer.write(data)
+        self._writer.flush()
+        loc = (self._segment, offset, len(data))
+        self._index_writer.write(INDEX_RECORD.pack(digest, *loc))
+        self._index_writer.flush()
+        self._index[digest] = loc
+        return "sha256:" + digest.hex(), _locator(loc)
+
+    # --- read -------------------------------------------------------------
+
+    def locate(self, record_hash: str) -> Optional[dict]:
+        loc = self._index.get(_digest_bytes(record_hash))
+        return _locator(loc) if loc else None
+
+    def get_bytes(self, locator: dict) -> bytes:
+        segment = locator["segment"]
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = self._readers[segment] = open(self._segment_path(segment), "rb")
+        if segment == self._segment:
+            self._writer.flush()
+        reader.seek(locator["offset"])
+        return reader.read(locator["length"])
+
+    def get(self, locator: dict, record_hash: Optional[str] = None):
+        data = self.get_bytes(locator)
+        if record_hash is not None and "sha256:" + hashlib.sha256(data).hexdigest() != record_hash:
+            raise ValueError(f"Payload digest mismatch at {locator} (expected {record_hash})")
+        return json.loads(data)
+
+    def __contains__(self, record_hash: str) -> bool:
+        return _digest_bytes(record_hash) in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    # --- maintenance ------------------------------------------------------
+
+    def stats(self) -> dict:
+        segments = sorted(self.root.glob("seg-*.pack"))
+        return {
+            "objects": len(self._index),
+            "segments": len(segments),
+            "segment_bytes": sum(p.stat().st_size for p in segments),
+            "index_bytes": (self.root / "index.bin").stat().st_size,
+            "dedup_hits": self.dedup_hits,
+        }
+
+    def verify(self) -> Tuple[bool, list]:
+        """Re-hash every stored object against its index digest."""
+        bad = []
+        for digest, loc in self._index.items():
+            if hashlib.sha256(self.get_bytes(_locator(loc))).digest() != digest:
+                bad.append("sha256:" + digest.hex())
+        return not bad, bad
+
+    def close(self) -> None:
+        self._writer.close()
+        self._index_writer.close()
+        for r in self._readers.values():
+            r.close()
+        self._readers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- internals --------------------------------------------------------
+
+    def _segment_path(self, n: int) -> Path:
+        return self.root / f"seg-{n:06d}.pack"
+
+    def _load_index(self) -> None:
+        path = self.root / "index.bin"
+        if not path.exists():
+            return
+        raw = path.read_bytes()
+        usable = len(raw) - len(raw) % INDEX_RECORD.size  # ignore a torn trailing record
+        for digest, seg, off, length in INDEX_RECORD.iter_unpack(raw[:usable]):
+            self._index[digest] = (seg, off, length)
+
+
+def _locator(loc: Tuple[int, int, int]) -> dict:
+    return {"segment": loc[0], "offset": loc[1], "length": loc[2]}
+
+
+def _digest_bytes(record_hash: str) -> bytes:
+    return bytes.fromhex(record_hash.split(":", 1)[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paygod content-addressed payload store")
+    parser.add_argument("--store", required=True, help="Store directory")
+    parser.add_argument("command", choices=["stats", "verify"])
+    args = parser.parse_args()
+
+    with PayloadStore(args.store) as store:
+        if args.command == "stats":
+            print(json.dumps(store.stats(), indent=2))
+            return 0
+        ok, bad = store.verify()
+        print(json.dumps({"ok": ok, "objects": len(store), "corrupted": bad}, indent=2))
+        return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
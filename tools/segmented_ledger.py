@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Segmented ledger: fixed-size segments that are sealed, compressed and seekable.
+
+Layout (<dir>/):
+- seg-000000.zseg / seg-000000.seal.json   sealed segments
+- seg-000003.jsonl                         the open tail segment (plain JSONL)
+
+A segment is sealed once it holds `segment_entries` entries. Its entries are
+compressed with zlib in independent frames of `frame_entries` entries. The seal
+records:
+- first_index / last_index
+- first_prev_hash: prev_hash of the first entry (link to the previous segment)
+- tail_hash: sha256 of the last entry (what the next segment's first prev_hash must equal)
+- digest: sha256 of the .zseg file, plus its size
+- frames: [{first_index, offset, length}] so a random read decompresses one frame
+- prev_seal_hash: sha256 of the previous seal, chaining the seals themselves
+
+The first entry of the segment that follows a seal is an "evidence" record
+{"kind": "segment_seal", "segment": n, "seal_hash": sha256(seal)}, so the entry
+hash chain commits to the seal chain: rewriting a sealed segment and
+recomputing every later seal changes the head entry hash.
+
+Verification levels:
+- default: every .zseg file is re-hashed against its seal digest (no
+  decompression or JSON parsing), the seal chain and segment links are
+  checked, the open tail must commit to the latest seal, and only the tail is
+  re-walked entry by entry.
+- full=True: also decompress every sealed segment, re-walk the whole chain and
+  check every seal commitment.
+
+Usage:
+  python tools/segmented_ledger.py verify <dir> [--full]
+  python tools/segmented_ledger.py get <dir> <entry_index>
+  python tools/segmented_ledger.py stats <dir>
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import instrument
+from simulate_ledger import Ledger, canonical_json, entry_hash, sha256
+
+DEFAULT_SEGMENT_ENTRIES = 10000
+DEFAULT_FRAME_ENTRIES = 256
+SEAL_RECORD_TYPE = "evidence"
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SegmentedLedger:
+    def __init__(self, directory, segment_entries: int = DEFAULT_SEGMENT_ENTRIES,
+                 frame_entries: int = DEFAULT_FRAME_ENTRIES, compress_level: int = 6):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.segment_entries = segment_entries
+        self.frame_entries = frame_entries
+        self.compress_level = compress_level
+        self.seals: List[dict] = [
+            json.loads(p.read_text(encoding="utf-8")) for p in sorted(self.dir.glob("seg-*.seal.json"))
+        ]
+        self._seal_firsts = [s["first_index"] for s in self.seals]
+        self._frame_cache: Tuple[Optional[tuple], List[bytes]] = (None, [])
+
+        self._tail_no = self.seals[-1]["segment"] + 1 if self.seals else 0
+        self._tail_offsets: List[int] = []
+        tail_path = self._tail_path()
+        head = None
+        if tail_path.exists():
+            offset = 0
+            with open(tail_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn final write; drop it
+                    self._tail_offsets.append(offset)
+                    offset += len(line)
+                    head = line
+            with open(tail_path, "r+b") as f:
+                f.truncate(offset)
+        if head is not None:
+            self.ledger = Ledger.from_chain([json.loads(head)])
+        elif self.seals:
+            self.ledger = Ledger.from_chain([self._read_sealed(self.seals[-1]["last_index"])])
+        else:
+            self.ledger = Ledger()
+        self._tail = open(tail_path, "ab")
+        if head is None and not self.seals:
+            self._write(self.ledger.chain[0])
+        elif head is None:
+            self._commit_seal(self.seals[-1])  # crashed between sealing and committing
+
+    # --- append / seal --------------------------------------------------------
+
+    def append(self, record_type, payload) -> dict:
+        entry = self._append(record_type, payload)
+        if len(self._tail_offsets) >= self.segment_entries:
+            self.seal()
+        return entry
+
+    def _append(self, record_type, payload) -> dict:
+        entry = self.ledger.append(record_type, payload)
+        self.ledger.chain = [entry]
+        self._write(entry)
+        return entry
+
+    def _commit_seal(self, seal: dict) -> dict:
+        return self._append(SEAL_RECORD_TYPE, _seal_record(seal))
+
+    def _write(self, entry: dict) -> None:
+        self._tail_offsets.append(self._tail.tell())
+        self._tail.write((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    @instrument.timed("ledger_seal")
+    def seal(self) -> Optional[dict]:
+        """Seal the open tail segment (no-op when it is empty)."""
+        if not self._tail_offsets:
+            return None
+        self._tail.close()
+        tail_path = self._tail_path()
+        lines = tail_path.read_bytes().splitlines(keepends=True)
+        first = json.loads(lines[0])
+        last = json.loads(lines[-1])
+
+        zpath = self.dir / f"seg-{self._tail_no:06d}.zseg"
+        frames = []
+        with open(zpath, "wb") as f:
+            for i in range(0, len(lines), self.frame_entries):
+                block = zlib.compress(b"".join(lines[i:i + self.frame_entries]), self.compress_level)
+                frames.append({"first_index": first["entry_index"] + i, "offset": f.tell(), "length": len(block)})
+                f.write(block)
+
+        seal = {
+            "segment": self._tail_no,
+            "first_index": first["entry_index"],
+            "last_index": last["entry_index"],
+            "first_prev_hash": first["prev_hash"],
+            "tail_hash": entry_hash(last),
+            "digest": _file_sha256(zpath),
+            "size": zpath.stat().st_size,
+            "raw_size": sum(len(l) for l in lines),
+            "frames": frames,
+            "prev_seal_hash": sha256(canonical_json(self.seals[-1])) if self.seals else None,
+        }
+        seal_path = self.dir / f"seg-{self._tail_no:06d}.seal.json"
+        tmp = seal_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(seal, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, seal_path)
+        tail_path.unlink()
+
+        self.seals.append(seal)
+        self._seal_firsts.append(seal["first_index"])
+        self._tail_no += 1
+        self._tail_offsets = []
+        self._tail = open(self._tail_path(), "ab")
+        self._commit_seal(seal)
+        return seal
+
+    # --- reads ------------------------------------------------------------------
+
+    def get(self, entry_index: int) -> dict:
+        if self._tail_offsets and entry_index >= self.ledger.chain[-1]["entry_index"] - len(self._tail_offsets) + 1:
+            return self._read_tail(entry_index)
+        return self._read_sealed(entry_index)
+
+    def _read_tail(self, entry_index: int) -> dict:
+        self._tail.flush()
+        pos = entry_index - (self.ledger.chain[-1]["entry_index"] - len(self._tail_offsets) + 1)
+        with open(self._tail_path(), "rb") as f:
+            f.seek(self._tail_offsets[pos])
+            return json.loads(f.readline())
+
+    def _read_sealed(self, entry_index: int) -> dict:
+        si = bisect.bisect_right(self._seal_firsts, entry_index) - 1
+        if si < 0 or entry_index > self.seals[si]["last_index"]:
+            raise IndexError(entry_index)
+        seal = self.seals[si]
+        frames = seal["frames"]
+        fi = bisect.bisect_right([fr["first_index"] for fr in frames], entry_index) - 1
+        frame = frames[fi]
+        key = (seal["segment"], fi)
+        if self._frame_cache[0] != key:
+            with open(self.dir / f"seg-{seal['segment']:06d}.zseg", "rb") as f:
+                f.seek(frame["offset"])
+                data = zlib.decompress(f.read(frame["length"]))
+            self._frame_cache = (key, data.splitlines())
+        return json.loads(self._frame_cache[1][entry_index - frame["first_index"]])
+
+    def _sealed_entries(self, seal: dict):
+        with open(self.dir / f"seg-{seal['segment']:06d}.zseg", "rb") as f:
+            for frame in seal["frames"]:
+                f.seek(frame["offset"])
+                for line in zlib.decompress(f.read(frame["length"])).splitlines():
+                    yield json.loads(line)
+
+    def _tail_entries(self):
+        self._tail.flush()
+        with open(self._tail_path(), "rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    # --- verification -------------------------------------------------------------
+
+    @instrument.timed("ledger_verify_segmented")
+    def verify(self, full: bool = False) -> Tuple[bool, List[str]]:
+        problems: List[str] = []
+        prev_seal = None
+        for seal in self.seals:
+            name = f"segment {seal['segment']}"
+            zpath = self.dir / f"seg-{seal['segment']:06d}.zseg"
+            expected_prev = sha256(canonical_json(prev_seal)) if prev_seal else None
+            if seal.get("prev_seal_hash") != expected_prev:
+                problems.append(f"{name}: seal chain broken")
+            if prev_seal is not None:
+                if seal["first_index"] != prev_seal["last_index"] + 1:
+                    problems.append(f"{name}: index gap after {prev_seal['last_index']}")
+                if seal["first_prev_hash"] != prev_seal["tail_hash"]:
+                    problems.append(f"{name}: does not link to segment {prev_seal['segment']}")
+            if not zpath.exists() or zpath.stat().st_size != seal["size"]:
+                problems.append(f"{name}: sealed file missing or resized")
+            elif _file_sha256(zpath) != seal["digest"]:
+                problems.append(f"{name}: digest mismatch")
+            elif full:
+                entries = self._sealed_entries(seal)
+                if prev_seal is not None:
+                    first = next(entries, None)
+                    problems += _commit_problems(first, prev_seal, name)
+                    entries = itertools.chain([first] if first else [], entries)
+                problems += self._walk(entries, seal["first_prev_hash"], name, expect_tail=seal["tail_hash"])
+            prev_seal = seal
+
+        if prev_seal is not None:
+            first = next(self._tail_entries(), None)
+            problems += _commit_problems(first, prev_seal, "tail")
+        if self._tail_offsets:
+            link = prev_seal["tail_hash"] if prev_seal else None
+            problems += self._walk(self._tail_entries(), link, "tail")
+        return not problems, problems
+
+    @staticmethod
+    def _walk(entries, link: Optional[str], name: str, expect_tail: Optional[str] = None) -> List[str]:
+        problems = []
+        prev_hash = link
+        last = None
+        for entry in entries:
+            if prev_hash is not None and entry["prev_hash"] != prev_hash:
+                problems.append(f"{name}: chain broken at entry {entry['entry_index']}")
+                break
+            prev_hash = entry_hash(entry)
+            last = entry
+        if expect_tail is not None and last is not None and not problems and prev_hash != expect_tail:
+            problems.append(f"{name}: tail hash does not match seal")
+        return problems
+
+    # --- misc -----------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        self._tail.flush()
+        tail_bytes = self._tail_path().stat().st_size if self._tail_path().exists() else 0
+        raw = sum(s["raw_size"] for s in self.seals)
+        stored = sum(s["size"] for s in self.seals)
+        return {
+            "sealed_segments": len(self.seals),
+            "tail_entries": len(self._tail_offsets),
+            "head_index": self.ledger.chain[-1]["entry_index"],
+            "sealed_raw_bytes": raw,
+            "sealed_bytes": stored,
+            "compression_ratio": round(raw / stored, 2) if stored else None,
+            "tail_bytes": tail_bytes,
+        }
+
+    def _tail_path(self) -> Path:
+        return self.dir / f"seg-{self._tail_no:06d}.jsonl"
+
+    def close(self) -> None:
+        self._tail.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _seal_record(seal: dict) -> dict:
+    return {"kind": "segment_seal", "segment": seal["segment"], "seal_hash": sha256(canonical_json(seal))}
+
+
+def _commit_problems(entry: Optional[dict], seal: dict, name: str) -> List[str]:
+    """The first entry after a seal must commit to it."""
+    if (entry is None or entry.get("record_type") != SEAL_RECORD_TYPE
+            or entry.get("record_payload") != _seal_record(seal)):
+        return [f"{name}: does not commit to the seal of segment {seal['segment']}"]
+    return []
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paygod segmented ledger")
+    sub = parser.add_subparsers(dest="command", required=True)
+    verify = sub.add_parser("verify", help="Verify sealed segments and the open tail")
+    verify.add_argument("directory")
+    verify.add_argument("--full", action="store_true", help="Decompress and re-walk every segment")
+    get = sub.add_parser("get", help="Print one entry by entry_index")
+    get.add_argument("directory")
+    get.add_argument("entry_index", type=int)
+    stats = sub.add_parser("stats", help="Segment and compression statistics")
+    stats.add_argument("directory")
+    args = parser.parse_args()
+
+    with SegmentedLedger(args.directory) as ledger:
+        if args.command == "verify":
+            ok, problems = ledger.verify(full=args.full)
+            print(json.dumps({"ok": ok, "problems": problems}, indent=2))
+            return 0 if ok else 1
+        if args.command == "get":
+            try:
+                print(json.dumps(ledger.get(args.entry_index), ensure_ascii=False))
+            except IndexError:
+                print(json.dumps({"error": f"entry {args.entry_index} not found"}))
+                return 1
+            return 0
+        print(json.dumps(ledger.stats(), indent=2))
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
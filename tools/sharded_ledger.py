@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Sharded multi-writer ledger with periodic cross-shard anchoring.
+
+A single hash chain serializes every append behind the previous entry's hash.
+ShardedLedger keeps N independent chains (simulate_ledger.Ledger). Records are
+partitioned by record_type or subject with a stable sha256-based mapping.
+Shards can be extended concurrently from worker processes because no shard
+depends on another.
+
+Global ordering and tamper evidence come from a separate anchor chain. Each
+anchor entry is an "evidence" record {"kind": "shard_anchor", "shards": [...]}
+committing to every shard head (entry_index + entry hash).
+Verification checks:
+- every shard chain
+- the anchor chain
+- that every anchored head exists in its shard with the same hash, and that
+  anchored positions never move backwards
+
+On disk (save/load): <dir>/shard-000.jsonl ... and <dir>/anchors.jsonl, one entry per line.
+
+Usage:
+  python tools/sharded_ledger.py bench --shards 4 --workers 4 --records 20000
+  python tools/sharded_ledger.py verify <dir>
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import instrument
+from simulate_ledger import Ledger, canonical_json, entry_hash
+
+PARTITIONS = ("record_type", "subject")
+ANCHOR_RECORD_TYPE = "evidence"
+
+
+def _extend_shard(head: dict, records: Sequence[Tuple[str, dict]]) -> List[dict]:
+    """Worker: append records to a shard resumed from its head; returns the new entries."""
+    ledger = Ledger.from_chain([head])
+    for record_type, payload in records:
+        ledger.append(record_type, payload)
+    return ledger.chain[1:]
+
+
+class ShardedLedger:
+    def __init__(self, shards: int = 4, partition: str = "record_type", anchor_every: int = 1000):
+        if partition not in PARTITIONS:
+            raise ValueError(f"partition must be one of {PARTITIONS}")
+        self.partition = partition
+        self.anchor_every = anchor_every
+        self.shards = [Ledger() for _ in range(shards)]
+        self.anchors = Ledger()
+        self._since_anchor = 0
+
+    # --- partitioning -----------------------------------------------------------
+
+    def shard_for(self, record_type: str, payload: dict) -> int:
+        if self.partition == "subject":
+            key = canonical_json(payload.get("subject"))
+        else:
+            key = record_type
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % len(self.shards)
+
+    # --- append -----------------------------------------------------------------
+
+    def append(self, record_type: str, payload: dict) -> dict:
+        entry = self.shards[self.shard_for(record_type, payload)].append(record_type, payload)
+        self._tick(1)
+        return entry
+
+    @instrument.timed("ledger_append_many")
+    def append_many(self, records: Iterable[Tuple[str, dict]], workers: Optional[int] = None) -> int:
+        """
+        Append a batch, extending shards in parallel worker processes, then anchor.
+        Order is preserved within each shard.
+        """
+        batches: List[List[Tuple[str, dict]]] = [[] for _ in self.shards]
+        for record_type, payload in records:
+            batches[self.shard_for(record_type, payload)].append((record_type, payload))
+
+        jobs = [(i, batch) for i, batch in enumerate(batches) if batch]
+        total = sum(len(b) for _, b in jobs)
+        instrument.count("records", total, stage="ledger_append_many")
+        if workers == 1 or len(jobs) <= 1:
+            for i, batch in jobs:
+                self.shards[i].chain.extend(_extend_shard(self.shards[i].chain[-1], batch))
+        else:
+            with ProcessPoolExecutor(max_workers=workers or len(jobs)) as pool:
+                futures = [(i, pool.submit(_extend_shard, self.shards[i].chain[-1], batch)) for i, batch in jobs]
+                for i, fut in futures:
+                    self.shards[i].chain.extend(fut.result())
+
+        self.anchor()
+        return total
+
+    def _tick(self, n: int) -> None:
+        self._since_anchor += n
+        if self.anchor_every and self._since_anchor >= self.anchor_every:
+            self.anchor()
+
+    def heads(self) -> List[dict]:
+        return [
+            {"shard": i, "entry_index": s.chain[-1]["entry_index"], "entry_hash": entry_hash(s.chain[-1])}
+            for i, s in enumerate(self.shards)
+        ]
+
+    def anchor(self) -> dict:
+        """Append an anchor entry committing to all current shard heads."""
+        self._since_anchor = 0
+        return self.anchors.append(ANCHOR_RECORD_TYPE, {"kind": "shard_anchor", "shards": self.heads()})
+
+    # --- verification -----------------------------------------------------------
+
+    @instrument.timed("ledger_verify_sharded")
+    def verify(self) -> Tuple[bool, List[str]]:
+        problems: List[str] = []
+        for i, shard in enumerate(self.shards):
+            ok, at = shard.verify()
+            if not ok:
+                problems.append(f"shard {i}: chain broken at entry {at}")
+
+        ok, at = self.anchors.verify()
+        if not ok:
+            problems.append(f"anchors: chain broken at entry {at}")
+
+        last_seen = [-1] * len(self.shards)
+        for anchor in self.anchors.chain[1:]:
+            name = f"anchor {anchor.get('entry_index')}"
+            payload = anchor.get("record_payload")
+            if (anchor.get("record_type") != ANCHOR_RECORD_TYPE or not isinstance(payload, dict)
+                    or payload.get("kind") != "shard_anchor" or not isinstance(payload.get("shards"), list)):
+                problems.append(f"{name}: not a shard anchor")
+                continue
+            heads = payload["shards"]
+            if len(heads) != len(self.shards):
+                problems.append(f"{name}: expected {len(self.shards)} shard heads, got {len(heads)}")
+                continue
+            seen = set()
+            for head in heads:
+                problems += [f"{name}: {p}" for p in self._check_head(head, seen, last_seen)]
+        return not problems, problems
+
+    def _check_head(self, head, seen: set, last_seen: List[int]) -> List[str]:
+        """Check one anchored head against its shard."""
+        if not isinstance(head, dict):
+            return ["malformed shard head"]
+        i, idx, digest = head.get("shard"), head.get("entry_index"), head.get("entry_hash")
+        if type(i) is not int or not 0 <= i < len(self.shards) or i in seen:
+            return [f"invalid or repeated shard {i!r}"]
+        seen.add(i)
+        if type(idx) is not int or not isinstance(digest, str):
+            return [f"shard {i} head is missing entry_index or entry_hash"]
+        problems = []
+        if idx < last_seen[i]:
+            problems.append(f"shard {i} moved backwards to {idx}")
+        last_seen[i] = idx
+        chain = self.shards[i].chain
+        base = chain[0]["entry_index"]
+        if not (0 <= idx - base < len(chain)):
+            problems.append(f"shard {i} entry {idx} missing")
+        elif entry_hash(chain[idx - base]) != digest:
+            problems.append(f"shard {i} entry {idx} hash mismatch")
+        return problems
+
+    # --- persistence ------------------------------------------------------------
+
+    def save(self, directory) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for i, shard in enumerate(self.shards):
+            _write_jsonl(directory / f"shard-{i:03d}.jsonl", shard.chain)
+        _write_jsonl(directory / "anchors.jsonl", self.anchors.chain)
+        (directory / "sharding.json").write_text(
+            json.dumps({"shards": len(self.shards), "partition": self.partition, "anchor_every": self.anchor_every},
+                       indent=2) + "\n",
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def load(cls, directory) -> "ShardedLedger":
+        directory = Path(directory)
+        meta = json.loads((directory / "sharding.json").read_text(encoding="utf-8"))
+        ledger = cls.__new__(cls)
+        ledger.partition = meta["partition"]
+        ledger.anchor_every = meta["anchor_every"]
+        ledger.shards = [Ledger.from_chain(_read_jsonl(directory / f"shard-{i:03d}.jsonl"))
+                         for i in range(meta["shards"])]
+        ledger.anchors = Ledger.from_chain(_read_jsonl(directory / "anchors.jsonl"))
+        ledger._since_anchor = 0
+        return ledger
+
+    def __len__(self) -> int:
+        return sum(len(s.chain) - 1 for s in self.shards)
+
+
+def _write_jsonl(path: Path, entries: Iterable[dict]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for e in entries:
+            f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+
+def _read_jsonl(path: Path) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paygod sharded ledger")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    bench = sub.add_parser("bench", help="Measure append throughput")
+    bench.add_argument("--shards", type=int, default=4)
+    bench.add_argument("--workers", type=int, default=None)
+    bench.add_argument("--records", type=int, default=20000)
+    bench.add_argument("--partition", choices=PARTITIONS, default="subject")
+    bench.add_argument("--out", help="Save the resulting ledger to this directory")
+
+    verify = sub.add_parser("verify", help="Verify a saved sharded ledger")
+    verify.add_argument("directory")
+
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        ok, problems = ShardedLedger.load(args.directory).verify()
+        print(json.dumps({"ok": ok, "problems": problems}, indent=2))
+        return 0 if ok else 1
+
+    ledger = ShardedLedger(shards=args.shards, partition=args.partition)
+    records = [
+        ("observation", {"subject": {"id": f"subject-{n % 997}"}, "source": "bench", "amount": n})
+        for n in range(args.records)
+    ]
+    start = time.perf_counter()
+    ledger.append_many(records, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    ok, problems = ledger.verify()
+    print(json.dumps({
+        "shards": args.shards,
+        "records": len(ledger),
+        "seconds": round(elapsed, 4),
+        "records_per_s": round(len(ledger) / elapsed, 1),
+        "verified": ok,
+    }, indent=2))
+    if args.out:
+        ledger.save(args.out)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,15 +3,36 @@ import json
 import uuid
 from datetime import datetime
 
+import instrument
+
+@instrument.timed("canonicalize")
 def canonical_json(obj):
     """Canonical JSON representation for consistent hashing."""
     return json.dumps(obj, sort_keys=True, separators=(',', ':'))
 
+@instrument.timed("hash")
 def sha256(data):
-    return "sha256:" + hashlib.sha256(data.encode('utf-8')).hexdigest()
+    data = data.encode('utf-8')
+    instrument.count("bytes", len(data), stage="hash")
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+def entry_hash(entry):
+    """
+    Hash used to chain entries. The optional `signature` is an attachment over
+    this hash, so it is left out; signing never changes the chain.
+    """
+    if "signature" in entry:
+        entry = {k: v for k, v in entry.items() if k != "signature"}
+    return sha256(canonical_json(entry))
 
 class Ledger:
-    def __init__(self):
+    def __init__(self, store=None):
+        """
+        store: optional payload_store.PayloadStore. When set, entries are
+        references-only: the payload is kept in the store and the entry carries
+        `record_hash` plus a `record_ref` locator instead of `record_payload`.
+        """
+        self.store = store
         self.chain = []
         # Genesis block
         self.chain.append({
@@ -24,33 +45,67 @@ class Ledger:
             "record_payload": {}
         })
 
+    @classmethod
+    def from_chain(cls, chain, store=None):
+        """Resume a ledger from existing entries (a full chain or just its head)."""
+        ledger = cls.__new__(cls)
+        ledger.store = store
+        ledger.chain = list(chain)
+        return ledger
+
+    @instrument.timed("ledger_append")
     def append(self, record_type, payload):
+        instrument.count("records", stage="ledger_append")
         prev_entry = self.chain[-1]
-        prev_hash = sha256(canonical_json(prev_entry))
+        prev_hash = entry_hash(prev_entry)
         
-        record_hash = sha256(canonical_json(payload))
+        if self.store is not None:
+            record_hash, record_ref = self.store.put(payload)
+        else:
+            record_hash = sha256(canonical_json(payload))
         
         entry = {
             "entry_id": str(uuid.uuid4()),
-            "entry_index": len(self.chain),
+            "entry_index": prev_entry["entry_index"] + 1,
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "prev_hash": prev_hash,
             "record_hash": record_hash,
             "record_type": record_type,
-            "record_payload": payload
         }
+        if self.store is not None:
+            entry["record_ref"] = record_ref
+        else:
+            entry["record_payload"] = payload
         
         self.chain.append(entry)
         return entry
 
-    def verify(self):
+    def payload(self, entry):
+        if "record_ref" in entry:
+            return self.store.get(entry["record_ref"], entry["record_hash"])
+        return entry["record_payload"]
+
+    @instrument.timed("ledger_verify")
+    def verify(self, check_payloads=False):
+        """
+        Walk the hash chain. Payloads are only read (and checked against
+        record_hash) when check_payloads is set.
+        """
         for i in range(1, len(self.chain)):
             current = self.chain[i]
             prev = self.chain[i-1]
             
-            calculated_prev_hash = sha256(canonical_json(prev))
+            calculated_prev_hash = entry_hash(prev)
             if current["prev_hash"] != calculated_prev_hash:
                 return False, i
+            if check_payloads:
+                try:
+                    payload = self.payload(current)
+                except (ValueError, OSError, KeyError, TypeError, AttributeError):
+                    # digest mismatch, unreadable store, malformed locator, or record_ref without a store
+                    return False, i
+                if sha256(canonical_json(payload)) != current["record_hash"]:
+                    return False, i
         return True, -1
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ import argparse
 import re
 from jsonschema import validate, ValidationError, FormatChecker
 
+import instrument
+
 # Custom format checkers for strict compliance
 checker = FormatChecker()
 
@@ -26,7 +28,9 @@ def main():
             instance = json.load(ifile)
 
         # Enforce strict validation
-        validate(instance=instance, schema=schema, format_checker=checker)
+        instrument.count("records", stage="schema_validate")
+        with instrument.stage("schema_validate"):
+            validate(instance=instance, schema=schema, format_checker=checker)
         
         print(json.dumps({"valid": True, "file": args.instance}))
         sys.exit(0)
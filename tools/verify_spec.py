@@ -2,15 +2,22 @@ import json
 import hashlib
 import sys
 import os
+import glob
 import jcs
 
+import instrument
+
+@instrument.timed("canonicalize")
 def canonicalize(obj):
     # Use actual JCS library for RFC 8785 compliance
     return jcs.canonicalize(obj).decode('utf-8')
 
 def calculate_hash(obj):
-    canonical_bytes = jcs.canonicalize(obj)
-    return hashlib.sha256(canonical_bytes).hexdigest()
+    with instrument.stage("canonicalize"):
+        canonical_bytes = jcs.canonicalize(obj)
+    instrument.count("bytes", len(canonical_bytes), stage="hash")
+    with instrument.stage("hash"):
+        return hashlib.sha256(canonical_bytes).hexdigest()
 
 def verify_file(filepath):
     print(f"🔍 Verifying {os.path.basename(filepath)}...")
@@ -50,16 +57,14 @@ def verify_file(filepath):
     
     return all_passed
 
-if __name__ == "__main__":
+def main():
     # Use relative path from the script location
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(script_dir)
     base_dir = os.path.join(project_root, "spec", "test-vectors")
     
-    files = [
-        os.path.join(base_dir, "canonical-json.json"),
-        os.path.join(base_dir, "ledger-chaining.json")
-    ]
+    # Every vector file, including regressions recorded by canonical_fuzz.py
+    files = sorted(glob.glob(os.path.join(base_dir, "*.json")))
     
     success = True
     for f in files:
@@ -73,7 +78,10 @@ if __name__ == "__main__":
     
     if success:
         print("\n✨ All Test Vectors Verified Successfully!")
-        sys.exit(0)
+        return 0
     else:
         print("\n💥 Verification Failed!")
-        sys.exit(1)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())